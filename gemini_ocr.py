@@ -12,31 +12,32 @@ including date, place, amount, and currency.
 """
 
 import os
-import sys
 import json
 import time
-import shutil
-import tempfile
 import img2pdf
 from pathlib import Path
 import logging
 import re
-import traceback
-from datetime import datetime
+import random
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Any, Optional, Tuple, Union
-from PIL import Image
 import io
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, A4
-import img2pdf
 
 # Google Gemini API
 from google import genai
 from google.genai import types
-import pathlib as pl
 import httpx
 from dotenv import load_dotenv
 
+# Helpers shared with mistral_ocr (JSON, atomic writes, cache hashing, unique names, rate limiting)
+# mistral_ocr와 공유하는 헬퍼 (JSON, 원자적 쓰기, 캐시 해시, 고유 이름, 속도 제한)
+from ocr_common import (
+    RateLimiter, claim_unique_path, release_claimed_path, loads_json, dumps_json_bytes,
+    write_bytes_atomic, content_hash, file_content_hash, load_cached_result, save_cached_result,
+)
+
 # Load environment variables from .env file
 # .env 파일에서 환경 변수 로드
 # override=True: .env 파일의 값이 환경 변수를 덮어씁니다 (환경 변수에 이미 값이 있어도 .env 우선)
@@ -59,6 +60,10 @@ def mask_api_key(api_key: str) -> str:
         return "***"
     return f"{api_key[:4]}...{api_key[-4:]}"
 
+# Masked key computed once for the per-call log lines
+# 호출마다 출력하는 로그용으로 한 번만 계산한 마스킹된 키
+MASKED_GOOGLE_API_KEY = mask_api_key(GOOGLE_API_KEY) if GOOGLE_API_KEY else "Not set"
+
 
 prompt = """
         Extract the following information from this receipt:
@@ -107,8 +112,11 @@ prompt = """
     
 
 # Configure logging
+# OCR_DEBUG=1 enables DEBUG records (e.g. per-call API details); INFO otherwise
+# OCR_DEBUG=1이면 DEBUG 로그(예: 호출별 API 정보) 출력, 아니면 INFO
+OCR_DEBUG = os.getenv("OCR_DEBUG", "").strip().lower() in ("1", "true")
 logging.basicConfig(
-    level=logging.INFO,
+    level=logging.DEBUG if OCR_DEBUG else logging.INFO,
     format='%(levelname)s-\t%(asctime)s\t-%(filename)s:%(lineno)d-%(funcName)s(): \t%(message)s'
 )
 logger = logging.getLogger(__name__)
@@ -116,7 +124,7 @@ logger = logging.getLogger(__name__)
 # Log API key status after logger is initialized
 # 로거 초기화 후 API 키 상태 로깅
 if GOOGLE_API_KEY:
-    logger.info(f"GOOGLE_API_KEY loaded from .env: {mask_api_key(GOOGLE_API_KEY)}")
+    logger.info(f"GOOGLE_API_KEY loaded from .env: {MASKED_GOOGLE_API_KEY}")
     logger.info(f"Full GOOGLE_API_KEY from .env: {GOOGLE_API_KEY}")
     
     # Check if there's a mismatch between .env and environment variable
@@ -127,7 +135,7 @@ if GOOGLE_API_KEY:
     if env_var_key and env_var_key != GOOGLE_API_KEY:
         logger.warning(f"⚠️ Environment variable GOOGLE_API_KEY differs from .env file!")
         logger.warning(f"Environment var: {mask_api_key(env_var_key)}")
-        logger.warning(f"Using .env value: {mask_api_key(GOOGLE_API_KEY)}")
+        logger.warning(f"Using .env value: {MASKED_GOOGLE_API_KEY}")
         logger.info(f"Full .env GOOGLE_API_KEY: {GOOGLE_API_KEY}")
 else:
     logger.warning("GOOGLE_API_KEY not found in .env file")
@@ -137,25 +145,104 @@ else:
 SUPPORTED_EXTENSIONS = ['.pdf', '.jpg', '.jpeg', '.png']
 IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png']
 
+# Lower-cased, de-duplicated sets built once for O(1) membership checks on the hot paths
+# 자주 호출되는 경로에서 O(1) 포함 검사를 위해 한 번만 만드는 소문자/중복 제거 집합
+SUPPORTED_EXTENSION_SET = frozenset(ext.lower() for ext in SUPPORTED_EXTENSIONS)
+IMAGE_EXTENSION_SET = frozenset(ext.lower() for ext in IMAGE_EXTENSIONS)
+
+# Largest input file accepted; checked before anything is read into memory
+# 허용되는 최대 입력 파일 크기; 파일을 메모리로 읽기 전에 확인
+MAX_FILE_SIZE_MB = 50
+MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
+
+# Retry settings for transient Gemini API failures (429 / 5xx / network errors)
+# 일시적인 Gemini API 오류(429 / 5xx / 네트워크 오류)에 대한 재시도 설정
+MAX_API_RETRIES = 3
+RETRY_BASE_DELAY = 1.0   # seconds, doubled on each attempt
+RETRY_MAX_DELAY = 8.0    # cap for the exponential backoff
+RETRY_AFTER_MAX = 60.0   # cap for server-suggested retry delays
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Characters stripped from place names before they are used in file names
+# 파일 이름에 사용하기 전에 상점명에서 제거하는 문자
+_PLACE_STRIP_RE = re.compile(r'[^\w\s]')
+
+# Gemini's retryDelay detail in error messages (e.g. 'retryDelay': '17s')
+# 오류 메시지의 Gemini retryDelay 정보 (예: 'retryDelay': '17s')
+_RETRY_DELAY_RE = re.compile(r"retryDelay['\"]?\s*:\s*['\"]?(\d+(?:\.\d+)?)s")
+
+# Error text that indicates a rate limit / quota error (Gemini reports these as 429 RESOURCE_EXHAUSTED)
+# 속도 제한/할당량 오류를 나타내는 오류 메시지 (Gemini는 429 RESOURCE_EXHAUSTED로 보고)
+RATE_LIMIT_RE = re.compile(r"\b429\b|rate[\s_-]?limit|quota|resource[\s_]?exhausted", re.IGNORECASE)
+
+# Per-request HTTP timeout, so a stalled connection fails (and is retried) instead of hanging a worker
+# 연결이 멈췄을 때 작업자가 멈추지 않고 실패(및 재시도)하도록 하는 요청별 HTTP 타임아웃
+OCR_HTTP_TIMEOUT = float(os.getenv("OCR_HTTP_TIMEOUT", "120") or 120)  # seconds
+
+# Receipt fields every result is expected to carry
+# 모든 결과에 포함되어야 하는 영수증 필드
+REQUIRED_FIELDS = ("date", "place", "amount", "currency")
+
+# Gemini model used for extraction
+# 정보 추출에 사용하는 Gemini 모델
+GEMINI_MODEL = "gemini-2.0-flash"
+
+# Documents larger than this are uploaded through the Files API instead of being
+# base64-inlined into the request body (Gemini rejects inline requests above ~20MB)
+# 이 크기보다 큰 문서는 요청 본문에 base64로 포함하지 않고 Files API로 업로드
+INLINE_DATA_MAX_BYTES = 20 * 1024 * 1024
+
+# On-disk cache of extraction results keyed by file content (set OCR_CACHE_DIR= to disable)
+# 파일 내용을 키로 하는 추출 결과 디스크 캐시 (OCR_CACHE_DIR= 로 비활성화)
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", "~/.cache/receipt_ocr").strip()
+OCR_CACHE_TTL = 30 * 24 * 60 * 60  # 30 days
+_CACHE_REQUEST_KEY = hashlib.sha1(f"{GEMINI_MODEL}\n{prompt}".encode('utf-8')).hexdigest()[:16]
+
+# Number of files processed concurrently in directory mode (API calls are I/O-bound)
+# 디렉토리 모드에서 동시에 처리할 파일 수 (API 호출은 I/O 위주)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "4") or 4)
+
+# Client-side rate limit for Gemini API calls (requests per second, shared by all threads)
+# Gemini API 호출에 대한 클라이언트 측 속도 제한 (초당 요청 수, 모든 스레드 공유)
+OCR_RPS = float(os.getenv("OCR_RPS", "5") or 5)
+_rate_limiter = RateLimiter(OCR_RPS)
+
+# Shared Gemini client, created on first use
+# 처음 사용할 때 생성되는 공유 Gemini 클라이언트
+_genai_client = None
+_genai_client_lock = threading.Lock()
+
 def get_genai_client():
     """
     Get genai.Client with API key authentication
     API 키 인증으로 genai.Client 가져오기
     
+    The client is created once and reused, so every call shares its HTTP connection pool
+    instead of paying a new TCP/TLS handshake per file.
+    클라이언트는 한 번만 생성되어 재사용되므로 모든 호출이 HTTP 연결 풀을 공유합니다.
+    
     Returns:
         genai.Client instance
     """
-    # Use API key authentication from .env file
-    # .env 파일에서 API 키 인증 사용
-    if GOOGLE_API_KEY:
-        logger.info(f"Using GOOGLE_API_KEY from .env file: {mask_api_key(GOOGLE_API_KEY)}")
-        logger.info(f"Full GOOGLE_API_KEY: {GOOGLE_API_KEY}")
-        return genai.Client(api_key=GOOGLE_API_KEY)
-    else:
-        # Try default (GOOGLE_API_KEY env var)
-        # 기본값 시도 (GOOGLE_API_KEY 환경 변수)
-        logger.info("Using default authentication (GOOGLE_API_KEY env var)")
-        return genai.Client()
+    global _genai_client
+    if _genai_client is not None:
+        return _genai_client
+    
+    with _genai_client_lock:
+        if _genai_client is None:
+            http_options = types.HttpOptions(timeout=int(OCR_HTTP_TIMEOUT * 1000))  # milliseconds
+            # Use API key authentication from .env file
+            # .env 파일에서 API 키 인증 사용
+            if GOOGLE_API_KEY:
+                logger.info(f"Using GOOGLE_API_KEY from .env file: {MASKED_GOOGLE_API_KEY}")
+                logger.info(f"Full GOOGLE_API_KEY: {GOOGLE_API_KEY}")
+                _genai_client = genai.Client(api_key=GOOGLE_API_KEY, http_options=http_options)
+            else:
+                # Try default (GOOGLE_API_KEY env var)
+                # 기본값 시도 (GOOGLE_API_KEY 환경 변수)
+                logger.info("Using default authentication (GOOGLE_API_KEY env var)")
+                _genai_client = genai.Client(http_options=http_options)
+        return _genai_client
 
 def check_authentication() -> bool:
     """
@@ -173,11 +260,12 @@ def check_authentication() -> bool:
         return False
     
     try:
-        # Try to create a client with the API key
-        client = genai.Client(api_key=GOOGLE_API_KEY)
+        # Create (or reuse) the shared client so the check doesn't build a throwaway one
+        # 공유 클라이언트를 생성(또는 재사용)하여 일회용 클라이언트를 만들지 않음
+        get_genai_client()
         # If no exception is raised, API key is likely set
         # Note: This doesn't verify if the key is valid, just if it's configured
-        logger.info(f"GOOGLE_API_KEY found and configured: {mask_api_key(GOOGLE_API_KEY)}")
+        logger.info(f"GOOGLE_API_KEY found and configured: {MASKED_GOOGLE_API_KEY}")
         logger.info(f"Full GOOGLE_API_KEY: {GOOGLE_API_KEY}")
         return True
     except Exception as e:
@@ -186,15 +274,10 @@ def check_authentication() -> bool:
         logger.error(".env 파일의 GOOGLE_API_KEY를 확인하세요.")
         return False
 
-def convert_image_to_pdf(image_path: Path) -> Optional[Path]:
-    """Convert image to PDF for processing"""
+def convert_image_to_pdf_bytes(image_path: Path) -> Optional[bytes]:
+    """Convert image to PDF in memory, without writing a temporary file"""
     try:
-        image = Image.open(image_path)
-        pdf_bytes = img2pdf.convert(image.filename)
-        temp_pdf_path = image_path.with_suffix('.pdf')
-        with open(temp_pdf_path, 'wb') as f:
-            f.write(pdf_bytes)
-        return temp_pdf_path
+        return img2pdf.convert(str(image_path))
     except Exception as e:
         logger.error(f"Failed to convert image to PDF: {e}")
         return None
@@ -209,6 +292,20 @@ def setup_directory(input_dir: Path, output_dir: Optional[Path] = None) -> Tuple
     temp_dir.mkdir(exist_ok=True)
     return input_dir, output_dir, temp_dir
 
+def list_supported_files(input_dir: Union[str, Path]) -> List[Path]:
+    """
+    List supported files in a directory with a single os.scandir pass
+    단일 os.scandir 패스로 디렉토리의 지원 파일 목록 반환
+    
+    Hidden files and subdirectories are skipped; the result is sorted for a consistent processing order.
+    """
+    with os.scandir(input_dir) as it:
+        paths = [Path(entry.path) for entry in it
+                 if not entry.name.startswith('.')
+                 and os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTENSION_SET
+                 and entry.is_file()]
+    return sorted(paths)
+
 def generate_filename_from_info(extracted_info: Dict[str, Any], original_path: Path) -> str:
     """Generate a filename based on extracted receipt information"""
     date = extracted_info.get('date', 'NA')
@@ -218,7 +315,7 @@ def generate_filename_from_info(extracted_info: Dict[str, Any], original_path: P
     
     # Clean up place name for filename
     if place and place.lower() != 'na':
-        place = re.sub(r'[^\w\s]', '', place)
+        place = _PLACE_STRIP_RE.sub('', place)
         place = place.replace(' ', '_')[:30]
     
     parts = []
@@ -249,7 +346,6 @@ def generate_filename_from_info(extracted_info: Dict[str, Any], original_path: P
     
     # Add place if available
     if place and place.lower() != 'na':
-        place = re.sub(r'[^\w\s\u3131-\u3163\uac00-\ud7a3]', '', place)
         parts.append(place)
     
     # Add amount and currency if available
@@ -264,33 +360,165 @@ def generate_filename_from_info(extracted_info: Dict[str, Any], original_path: P
     else:
         return original_path.stem + "_receipt.pdf"
 
-def extract_info_with_gemini(file_path: Path) -> Optional[Dict[str, Any]]:
+def _is_retryable(status: Optional[int], text: str) -> bool:
+    """
+    Decide whether a failed API call is worth retrying
+    실패한 API 호출을 재시도할 가치가 있는지 판단
+    """
+    if status in RETRYABLE_STATUS_CODES:
+        return True
+    if status is not None and 400 <= status < 500:
+        return False  # Other client errors (bad key, bad request) never succeed on retry
+    return RATE_LIMIT_RE.search(text) is not None
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Get the server-suggested retry delay from a Retry-After header or Gemini's retryDelay detail
+    Retry-After 헤더 또는 Gemini의 retryDelay 정보에서 서버가 제안한 재시도 대기 시간 가져오기
+    """
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if headers:
+        retry_after = headers.get('Retry-After')
+        if retry_after:
+            try:
+                return min(float(retry_after), RETRY_AFTER_MAX)
+            except ValueError:
+                pass
+    match = _RETRY_DELAY_RE.search(str(error))
+    if match:
+        return min(float(match.group(1)), RETRY_AFTER_MAX)
+    return None
+
+def generate_content_with_retry(client, contents: List[Any], cancel_event: Optional[threading.Event] = None):
+    """
+    Call Gemini generate_content, retrying transient failures with exponential backoff
+    일시적인 오류는 지수 백오프로 재시도하며 Gemini generate_content 호출
+    
+    Only 429/5xx responses and network errors are retried; other errors are raised immediately.
+    429/5xx 응답과 네트워크 오류만 재시도하며, 그 외 오류는 즉시 발생시킵니다.
+    If cancel_event is set during a backoff wait, the last error is raised without retrying.
+    백오프 대기 중 cancel_event가 설정되면 재시도하지 않고 마지막 오류를 발생시킵니다.
+    """
+    for attempt in range(MAX_API_RETRIES):
+        _rate_limiter.wait()
+        try:
+            return client.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=contents
+            )
+        except Exception as e:
+            status = getattr(e, 'code', None)
+            if not isinstance(status, int):
+                status = None
+            retryable = isinstance(e, httpx.TransportError) or _is_retryable(status, str(e))
+            if not retryable or attempt == MAX_API_RETRIES - 1:
+                raise
+            
+            delay = min(RETRY_BASE_DELAY * (2 ** attempt), RETRY_MAX_DELAY)
+            if status == 429:
+                # Never retry earlier than the server asked; the 0-50% jitter on top keeps pool
+                # threads that hit the limit together from all retrying at the same moment
+                # 서버가 요청한 시간보다 일찍 재시도하지 않으며, 0-50% 지터로 함께 제한에 걸린
+                # 풀 스레드들이 동시에 재시도하지 않도록 함
+                delay = max(delay, _retry_after_seconds(e) or 0) * random.uniform(1.0, 1.5)
+            else:
+                delay += random.uniform(0, 0.5)  # Jitter to avoid synchronized retries
+            
+            logger.warning(f"Gemini API call failed ({status or type(e).__name__}), "
+                           f"retrying in {delay:.1f}s (attempt {attempt + 1}/{MAX_API_RETRIES})")
+            if cancel_event is None:
+                time.sleep(delay)
+            elif cancel_event.wait(delay):
+                raise  # Cancelled while waiting; report the last failure
+
+def _cache_path_for(source: Union[bytes, Path]) -> Optional[Path]:
+    """
+    Get the cache file path for a document (bytes or a file path), or None if caching is disabled
+    문서(바이트 또는 파일 경로)에 대한 캐시 파일 경로 반환 (캐시 비활성화 시 None)
+    """
+    if not OCR_CACHE_DIR:
+        return None
+    digest = file_content_hash(source) if isinstance(source, Path) else content_hash(source)
+    return Path(OCR_CACHE_DIR).expanduser() / f"{digest}_{_CACHE_REQUEST_KEY}.json"
+
+def extract_info_with_gemini(file_path: Path, data: Optional[bytes] = None,
+                             cancel_event: Optional[threading.Event] = None) -> Optional[Dict[str, Any]]:
     """
     Extract information from a receipt using Google Gemini
     
     Args:
         file_path: Path to the PDF file to process
+        data: PDF bytes already in memory (e.g. a converted image); read from file_path if None
+        cancel_event: Optional event that, once set, stops the request before upload and between retries
         
     Returns:
         Dictionary with extracted receipt information
-    """
-    # Get client with appropriate authentication
-    # 적절한 인증으로 클라이언트 가져오기
-    logger.info(f"Calling Gemini API with GOOGLE_API_KEY: {mask_api_key(GOOGLE_API_KEY) if GOOGLE_API_KEY else 'Not set'}")
-    logger.info(f"Full GOOGLE_API_KEY used for API call: {GOOGLE_API_KEY}")
-    client = get_genai_client()
     
+    Results are cached by the content of the original file, so identical documents are not sent
+    to the API again, even under a different name.
+    결과는 원본 파일 내용 기준으로 캐시되므로 이름이 달라도 동일한 문서는 API로 다시 전송되지 않습니다.
+    """
     try:
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=[
-                types.Part.from_bytes(
-                    data=file_path.read_bytes(),
-                    mime_type='application/pdf',
-                ),
-                prompt
-            ]
-        )
+        in_memory = data is not None
+        size = len(data) if in_memory else file_path.stat().st_size
+        use_upload = size > INLINE_DATA_MAX_BYTES
+        # Large files on disk are hashed via mmap and streamed by the upload, never read whole
+        # 디스크의 대용량 파일은 mmap으로 해시하고 업로드 시 스트리밍하여 전체를 읽지 않음
+        if not in_memory and not use_upload:
+            data = file_path.read_bytes()
+        
+        # Key the cache on the original file: converted image PDFs carry a creation timestamp,
+        # so their bytes differ on every conversion and would never hit the cache
+        # 원본 파일 기준으로 캐시 키 생성: 변환된 이미지 PDF는 생성 시각을 포함하여 매번 바이트가 달라짐
+        if in_memory and file_path.is_file():
+            cache_source = file_path
+        else:
+            cache_source = data if data is not None else file_path
+        cache_path = _cache_path_for(cache_source)
+        if cache_path is not None:
+            cached = load_cached_result(cache_path, OCR_CACHE_TTL)
+            if cached is not None:
+                logger.info(f"Using cached OCR result for {file_path.name}: {cache_path.name}")
+                return cached
+        
+        # Get client with appropriate authentication
+        # 적절한 인증으로 클라이언트 가져오기
+        # Per-call line at DEBUG with lazy arguments; the key itself is logged once at startup
+        # 호출마다 출력되는 로그는 DEBUG 레벨과 지연 인자로 처리; 키 자체는 시작 시 한 번만 기록
+        logger.debug("Calling Gemini API with GOOGLE_API_KEY: %s", MASKED_GOOGLE_API_KEY)
+        client = get_genai_client()
+        
+        if cancel_event is not None and cancel_event.is_set():
+            logger.info(f"Cancelled before calling Gemini API: {file_path.name}")
+            return None
+        
+        uploaded_file = None
+        if use_upload:
+            # Let the SDK stream the file instead of holding base64 + JSON copies in memory
+            # 메모리에 base64 및 JSON 사본을 유지하지 않고 SDK가 파일을 스트리밍하도록 함
+            upload_source = io.BytesIO(data) if in_memory else str(file_path)
+            del data
+            logger.info(f"Uploading large document via Files API: {file_path.name}")
+            uploaded_file = client.files.upload(
+                file=upload_source,
+                config=types.UploadFileConfig(mime_type='application/pdf')
+            )
+            document_part = uploaded_file
+        else:
+            document_part = types.Part.from_bytes(
+                data=data,
+                mime_type='application/pdf',
+            )
+        
+        try:
+            response = generate_content_with_retry(client, [document_part, prompt], cancel_event)
+        finally:
+            if uploaded_file is not None:
+                try:
+                    client.files.delete(name=uploaded_file.name)
+                except Exception as e:
+                    logger.warning(f"Failed to delete uploaded file {uploaded_file.name}: {e}")
         
         # Extract JSON from response
         response_text = response.text.strip()
@@ -304,7 +532,9 @@ def extract_info_with_gemini(file_path: Path) -> Optional[Dict[str, Any]]:
         else:
             json_str = response_text
             
-        result = json.loads(json_str)
+        result = loads_json(json_str)
+        if cache_path is not None and isinstance(result, dict):
+            save_cached_result(cache_path, result)
         return result
         
     except Exception as e:
@@ -322,54 +552,64 @@ def extract_info_with_gemini(file_path: Path) -> Optional[Dict[str, Any]]:
         elif "401" in error_str or "UNAUTHENTICATED" in error_str:
             logger.error("API Key is invalid or missing. Please set GOOGLE_API_KEY in .env file.")
             logger.error("API 키가 유효하지 않거나 없습니다. .env 파일에 GOOGLE_API_KEY를 설정하세요.")
-        elif "429" in error_str or "rate limit" in error_str.lower():
+        elif RATE_LIMIT_RE.search(error_str):
             logger.error("API rate limit exceeded. Please wait and try again later.")
             logger.error("API 호출 한도를 초과했습니다. 잠시 후 다시 시도하세요.")
         
         return None
 
-def process_file(file_path: Union[str, Path], temp_dir: Path) -> Optional[Dict[str, Any]]:
+def process_file(file_path: Union[str, Path], temp_dir: Path,
+                 cancel_event: Optional[threading.Event] = None,
+                 rename: bool = True) -> Optional[Dict[str, Any]]:
     """
     Process a file and extract information using Gemini, then rename the file in place
     
     Args:
         file_path: Path to the file to process
         temp_dir: Directory to store temporary files
+        cancel_event: Optional event that aborts the Gemini request once set (see extract_info_with_gemini)
+        rename: If False, the file keeps its original name (and images are not replaced by a PDF)
         
     Returns:
         Dictionary with extracted information or None if processing failed
     """
-    temp_pdf_path = None
-    final_pdf_path = None
+    pdf_bytes = None
     info_path = None
     missing_fields = []
     
     try:
         file_path = Path(file_path) if not isinstance(file_path, Path) else file_path
         
-        # Validate file exists and has supported extension
-        if not file_path.exists():
+        # Normalize the extension once; it drives both validation and the image/PDF branch
+        suffix = file_path.suffix.lower()
+        if suffix not in SUPPORTED_EXTENSION_SET:
+            logger.error(f"Unsupported file extension: {file_path.suffix}")
+            return None
+        
+        # One stat both confirms the file exists and gives its size
+        # stat 한 번으로 파일 존재 여부와 크기를 함께 확인
+        try:
+            file_size = file_path.stat().st_size
+        except FileNotFoundError:
             logger.error(f"File not found: {file_path}")
             return None
-            
-        if file_path.suffix.lower() not in SUPPORTED_EXTENSIONS:
-            logger.error(f"Unsupported file extension: {file_path.suffix}")
+        
+        # Reject oversized files before reading or converting them
+        if file_size > MAX_FILE_SIZE_BYTES:
+            logger.error(f"File size ({file_size / (1024 * 1024):.2f}MB) exceeds the {MAX_FILE_SIZE_MB}MB limit: {file_path}")
             return None
         
-        # Convert image to PDF if needed
-        is_image = file_path.suffix.lower() in IMAGE_EXTENSIONS
+        # Convert image to PDF if needed (kept in memory until the final rename)
+        is_image = suffix in IMAGE_EXTENSION_SET
         if is_image:
             logger.info(f"Converting image to PDF: {file_path}")
-            temp_pdf_path = convert_image_to_pdf(file_path)
-            if temp_pdf_path is None:
+            pdf_bytes = convert_image_to_pdf_bytes(file_path)
+            if pdf_bytes is None:
                 logger.error(f"Failed to convert image to PDF: {file_path}")
                 return None
-            process_path = temp_pdf_path
-        else:
-            process_path = file_path
         
         # Extract information using Gemini
-        extracted_info = extract_info_with_gemini(process_path)
+        extracted_info = extract_info_with_gemini(file_path, data=pdf_bytes, cancel_event=cancel_event)
         
         # Check if extraction failed
         if extracted_info is None:
@@ -383,7 +623,7 @@ def process_file(file_path: Union[str, Path], temp_dir: Path) -> Optional[Dict[s
             }
             
         # Fill missing fields with 'NA' for date, place, amount, currency
-        for field in ["date", "place", "amount", "currency"]:
+        for field in REQUIRED_FIELDS:
             value = extracted_info.get(field, None)
             if value is None or (isinstance(value, str) and not value.strip()):
                 extracted_info[field] = "NA"
@@ -396,45 +636,53 @@ def process_file(file_path: Union[str, Path], temp_dir: Path) -> Optional[Dict[s
         new_filename = generate_filename_from_info(extracted_info, file_path)
         logger.info(f"Generated filename: {new_filename}")
         
+        # Both outputs hold the same JSON, so serialize once and write it twice
+        # 두 출력은 같은 JSON이므로 한 번 직렬화하여 두 번 기록
+        encoded_info = dumps_json_bytes(extracted_info)
+        
         # Save OCR text to temp directory
         text_path = temp_dir / f"{file_path.stem}.txt"
-        with open(text_path, 'w', encoding='utf-8') as f:
-            f.write(json.dumps(extracted_info, ensure_ascii=False, indent=2))
+        write_bytes_atomic(text_path, encoded_info)
         logger.info(f"OCR text saved to: {text_path}")
         
         # Save extracted info to temp directory
         info_path = temp_dir / f"{file_path.stem}.json"
-        with open(info_path, 'w', encoding='utf-8') as f:
-            json.dump(extracted_info, f, ensure_ascii=False, indent=2)
+        write_bytes_atomic(info_path, encoded_info)
         logger.info(f"Extracted information saved to: {info_path}")
         
-        # Determine source PDF (original or converted from image)
-        source_pdf = temp_pdf_path if temp_pdf_path else file_path
-        
-        # Rename the file in place
-        try:
-            target_path = file_path.parent / new_filename
-            
-            # If we converted an image to PDF, remove the original image
-            if is_image and temp_pdf_path:
-                os.remove(file_path)  # Remove original image
-                file_path = temp_pdf_path  # Update file_path to point to the PDF
+        # Rename the file in place (unless the caller keeps original names)
+        # 파일 이름을 제자리에서 변경 (호출자가 원래 이름을 유지하는 경우 제외)
+        if not rename:
+            extracted_info['final_path'] = str(file_path)
+        else:
+            claimed_path = None
+            try:
+                target_path = file_path.parent / new_filename
+                if target_path != file_path:
+                    target_path = claimed_path = claim_unique_path(target_path)
             
-            # Rename the file
-            os.rename(file_path, target_path)
-            logger.info(f"File renamed to: {target_path}")
+                if is_image:
+                    # Write the converted PDF under the new name (atomically, so an interrupted
+                    # write never leaves a truncated receipt), then remove the original image
+                    write_bytes_atomic(target_path, pdf_bytes)
+                    os.remove(file_path)
+                else:
+                    # Rename the file
+                    os.rename(file_path, target_path)
+                logger.info(f"File renamed to: {target_path}")
             
-            # Add final path to the extracted info
-            extracted_info['final_path'] = str(target_path)
+                # Add final path to the extracted info
+                extracted_info['final_path'] = str(target_path)
             
-        except Exception as e:
-            logger.error(f"Failed to rename file {file_path} to {target_path}: {e}")
-            if temp_pdf_path and os.path.exists(temp_pdf_path):
-                os.remove(temp_pdf_path)  # Clean up temp PDF if rename failed
-            raise
+            except Exception as e:
+                logger.error(f"Failed to rename file {file_path} to {target_path}: {e}")
+                raise
+            finally:
+                if claimed_path is not None:
+                    release_claimed_path(claimed_path)
         
         # Track missing fields
-        for field in ["date", "place", "amount", "currency"]:
+        for field in REQUIRED_FIELDS:
             if not extracted_info.get(field):
                 missing_fields.append(field)
         extracted_info['missing_fields'] = missing_fields
@@ -442,16 +690,20 @@ def process_file(file_path: Union[str, Path], temp_dir: Path) -> Optional[Dict[s
         return extracted_info
         
     except Exception as e:
-        logger.error(f"Error processing file {file_path}: {e}")
-        logger.error(traceback.format_exc())
+        logger.error(f"Error processing file {file_path}: {e}", exc_info=True)
         return None
 
-def process_directory(input_dir: Union[str, Path]) -> None:
+def process_directory(input_dir: Union[str, Path], max_workers: Optional[int] = None) -> None:
     """
     Process all files in a directory, renaming them in place
     
+    Files are processed concurrently by a thread pool; the shared rate limiter keeps
+    the API request rate bounded.
+    파일은 스레드 풀에서 동시에 처리되며, 공유 속도 제한기가 API 요청 속도를 제한합니다.
+    
     Args:
         input_dir: Path to the input directory containing files to process
+        max_workers: Number of files to process concurrently (defaults to OCR_WORKERS)
     """
     try:
         input_path = Path(input_dir)
@@ -466,32 +718,42 @@ def process_directory(input_dir: Union[str, Path]) -> None:
         processed_files = []
         failed_files = []
         missing_info_files = []  # (file_path, missing_fields)
-        missing_field_stats = {"date": 0, "place": 0, "amount": 0, "currency": 0}
+        missing_field_stats = dict.fromkeys(REQUIRED_FIELDS, 0)
         
-        # Process each file in the input directory
-        for file_path in sorted(input_path.glob('*')):  # Sort for consistent processing order
-            # Skip the temp directory itself and hidden files
-            if file_path == temp_path or file_path.name.startswith('.'):
-                continue
-                
-            if file_path.is_file() and file_path.suffix.lower() in SUPPORTED_EXTENSIONS:
+        # Collect files in the input directory (the temp directory is skipped as a non-file)
+        input_files = list_supported_files(input_path)
+        
+        # Process files concurrently; process_file handles its own errors per file
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers or OCR_WORKERS)) as executor:
+            futures = {}
+            for file_path in input_files:
                 logger.info(f"Processing file: {file_path}")
+                futures[executor.submit(process_file, file_path, temp_path)] = file_path
+            
+            for future in as_completed(futures):
+                file_path = futures[future]
+                try:
+                    results[file_path] = future.result()
+                except Exception as e:
+                    logger.error(f"Error processing file {file_path}: {e}")
+                    results[file_path] = None
+        
+        # Summarize in directory order
+        for file_path in input_files:
+            extracted_info = results.get(file_path)
+            if extracted_info:
+                processed_files.append((file_path, extracted_info.get('final_path', '')))
                 
-                # Process file with temp directory only
-                extracted_info = process_file(file_path, temp_path)
-                
-                if extracted_info:
-                    processed_files.append((file_path, extracted_info.get('final_path', '')))
-                    
-                    # Track missing fields
-                    missing_fields = extracted_info.get('missing_fields', [])
-                    if missing_fields:
-                        missing_info_files.append((file_path, missing_fields))
-                        for field in missing_fields:
-                            if field in missing_field_stats:
-                                missing_field_stats[field] += 1
-                else:
-                    failed_files.append(file_path)
+                # Track missing fields
+                missing_fields = extracted_info.get('missing_fields', [])
+                if missing_fields:
+                    missing_info_files.append((file_path, missing_fields))
+                    for field in missing_fields:
+                        if field in missing_field_stats:
+                            missing_field_stats[field] += 1
+            else:
+                failed_files.append(file_path)
         
         # Clean up temp directory if empty
         try:
@@ -521,14 +783,15 @@ def process_directory(input_dir: Union[str, Path]) -> None:
             logger.info("\nAll processed files have all key information extracted.")
             
     except Exception as e:
-        logger.error(f"Error processing directory {input_dir}: {e}")
-        logger.error(traceback.format_exc())
+        logger.error(f"Error processing directory {input_dir}: {e}", exc_info=True)
 
 if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description="Rename receipt files in place using information extracted by Google Gemini API")
     parser.add_argument("input", help="Path to input file or directory")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help=f"Number of files to process concurrently in directory mode (default: OCR_WORKERS={OCR_WORKERS})")
     
     args = parser.parse_args()
     
@@ -540,7 +803,7 @@ if __name__ == "__main__":
             temp_dir = input_path.parent / "temp_ocr_processing"
             temp_dir.mkdir(exist_ok=True, parents=True)
             
-            if input_path.suffix.lower() in SUPPORTED_EXTENSIONS:
+            if input_path.suffix.lower() in SUPPORTED_EXTENSION_SET:
                 logger.info(f"Processing file: {input_path}")
                 result = process_file(input_path, temp_dir)
                 if result:
@@ -560,9 +823,8 @@ if __name__ == "__main__":
                 logger.error(f"Unsupported file extension: {input_path.suffix}")
         elif input_path.is_dir():
             logger.info(f"Processing directory: {input_path}")
-            process_directory(input_path)
+            process_directory(input_path, max_workers=args.workers)
         else:
             logger.error(f"Input path does not exist: {input_path}")
     except Exception as e:
-        logger.error(f"Error: {e}")
-        logger.error(traceback.format_exc())
\ No newline at end of file
+        logger.error(f"Error: {e}", exc_info=True)
\ No newline at end of file
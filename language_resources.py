@@ -32,6 +32,7 @@ RESOURCES = {
         # OCR Options section
         "options_group": "OCR Options",
         "rate_limit_warning": "⚠️ Google Gemini API has rate limits. Processing will pause automatically if limits are reached.",
+        "workers_label": "Files processed concurrently:",
         
         # Rename options section
         "rename_group": "Rename Options",
@@ -85,7 +86,6 @@ RESOURCES = {
         "rate_limit_extract": "Rate limit reached during info extraction. Using OCR text only.",
         "extract_error": "Error extracting info: {0}",
         "process_success": "Successfully processed {0}. Saved to {1}",
-        "waiting_next": "Waiting 1 second before processing next file to avoid rate limiting...",
         "process_error": "Error processing {0}: {1}",
         "ocr_complete_count": "OCR processing complete. Processed {0} files.",
         "ocr_error": "Error in OCR processing: {0}",
@@ -109,6 +109,7 @@ RESOURCES = {
         # OCR Options section
         "options_group": "OCR 옵션",
         "rate_limit_warning": "⚠️ Google Gemini API에는 속도 제한이 있습니다. 제한에 도달하면 처리가 자동으로 일시 중지됩니다.",
+        "workers_label": "동시 처리 파일 수:",
         
         # Rename options section
         "rename_group": "이름 변경 옵션",
@@ -162,7 +163,6 @@ RESOURCES = {
         "rate_limit_extract": "정보 추출 중 속도 제한에 도달했습니다. OCR 텍스트만 사용합니다.",
         "extract_error": "정보 추출 오류: {0}",
         "process_success": "{0} 처리 성공. {1}에 저장됨",
-        "waiting_next": "속도 제한을 피하기 위해 다음 파일 처리 전 1초 대기 중...",
         "process_error": "{0} 처리 오류: {1}",
         "ocr_complete_count": "OCR 처리 완료. {0}개 파일 처리됨.",
         "ocr_error": "OCR 처리 중 오류: {0}"
@@ -178,40 +178,39 @@ class LanguageManager:
         self.current_language = default_language
         if self.current_language not in RESOURCES:
             self.current_language = "en"  # Fallback to English
+        self._texts = self._build_texts(self.current_language)
+    
+    @staticmethod
+    def _build_texts(language_code):
+        """
+        Build the lookup table for a language, with English fallbacks merged in once
+        영어 대체 텍스트를 한 번 병합한 언어별 조회 테이블 생성
+        """
+        return {**RESOURCES["en"], **RESOURCES[language_code]}
     
     def set_language(self, language_code):
         """Set the current language"""
         if language_code in RESOURCES:
             self.current_language = language_code
+            self._texts = self._build_texts(language_code)
             return True
         return False
     
     def get_text(self, key, *args):
         """
-        Get text for the specified key in the current language
+        Get text for the specified key in the current language (falling back to English)
         If args are provided, format the text with the arguments
         """
-        if key in RESOURCES[self.current_language]:
-            text = RESOURCES[self.current_language][key]
-            if args:
-                try:
-                    return text.format(*args)
-                except:
-                    return text
-            return text
-        
-        # Fallback to English if key not found in current language
-        if key in RESOURCES["en"]:
-            text = RESOURCES["en"][key]
-            if args:
-                try:
-                    return text.format(*args)
-                except:
-                    return text
-            return text
-        
-        # Return the key itself if not found in any language
-        return key
+        text = self._texts.get(key)
+        if text is None:
+            # Return the key itself if not found in any language
+            return key
+        if args:
+            try:
+                return text.format(*args)
+            except:
+                return text
+        return text
     
     def get_languages(self):
         """Get available languages"""
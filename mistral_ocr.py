@@ -12,27 +12,30 @@ including date, place, amount, and currency.
 """
 
 import os
-import sys
+import errno
 import json
-import requests
-import base64
 import time
+import random
+import hashlib
+import threading
 import shutil
-import traceback
-import tempfile
 import img2pdf
 from pathlib import Path
 import logging
 from dotenv import load_dotenv
 import re
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple, Union
-from PIL import Image
-import io
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, A4
+from typing import Dict, Any, Optional, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import httpx
 from mistralai import Mistral
-import img2pdf
+
+# Helpers shared with gemini_ocr (JSON, atomic writes, cache hashing, unique names, rate limiting)
+# gemini_ocr와 공유하는 헬퍼 (JSON, 원자적 쓰기, 캐시 해시, 고유 이름, 속도 제한)
+from ocr_common import (
+    RateLimiter, claim_unique_path, release_claimed_path, loads_json, dumps_json_bytes,
+    file_content_hash, load_cached_result, save_cached_result,
+)
 
 # Load environment variables from .env file
 # .env 파일에서 환경 변수 로드
@@ -40,8 +43,11 @@ load_dotenv()
 
 # Configure logging
 # 로깅 설정
+# OCR_DEBUG=1 enables DEBUG records (e.g. per-call API details); INFO otherwise
+# OCR_DEBUG=1이면 DEBUG 로그(예: 호출별 API 정보) 출력, 아니면 INFO
+OCR_DEBUG = os.getenv("OCR_DEBUG", "").strip().lower() in ("1", "true")
 logging.basicConfig(
-    level=logging.INFO,
+    level=logging.DEBUG if OCR_DEBUG else logging.INFO,
     format='%(levelname)s-\t%(asctime)s\t-%(filename)s:%(lineno)d-%(funcName)s(): \t%(message)s'
 )
 logger = logging.getLogger(__name__)
@@ -67,10 +73,118 @@ EXCHANGE_RATE_API_URL = "https://api.exchangerate-api.com/v4/latest/USD"
 SUPPORTED_EXTENSIONS = ['.pdf', '.jpg', '.jpeg', '.png', '.tiff', '.tif']
 IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.tiff', '.tif']
 
+# Lower-cased sets built once for O(1) membership checks on the per-file paths
+# 파일별 경로에서 O(1) 포함 검사를 위해 한 번만 만드는 소문자 집합
+SUPPORTED_EXTENSION_SET = frozenset(ext.lower() for ext in SUPPORTED_EXTENSIONS)
+IMAGE_EXTENSION_SET = frozenset(ext.lower() for ext in IMAGE_EXTENSIONS)
+
+# Largest input file accepted (Mistral's OCR upload limit); checked before anything is read
+# 허용되는 최대 입력 파일 크기 (Mistral OCR 업로드 제한); 파일을 읽기 전에 확인
+MAX_FILE_SIZE_MB = 50
+MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
+
+# Precompiled patterns for normalizing extracted fields
+# 추출된 필드 정규화를 위해 미리 컴파일한 패턴
+_NON_DIGIT_RE = re.compile(r'\D')
+_NON_AMOUNT_RE = re.compile(r'[^\d.]')
+_PLACE_STRIP_RE = re.compile(r'[^\w\s]')
+_JSON_OBJECT_RE = re.compile(r'{.*}', re.DOTALL)
+
+# Currency aliases normalized to ISO codes, checked in order (first match wins)
+# ISO 코드로 정규화되는 통화 별칭 (순서대로 확인하며 처음 일치하는 항목 사용)
+_CURRENCY_PATTERNS = (
+    (re.compile(r'KRW|KOR|원화|₩|KR'), 'KRW'),
+    (re.compile(r'USD|US|미국|달러|\$'), 'USD'),
+    (re.compile(r'EUR|EU|유로|€'), 'EUR'),
+    (re.compile(r'GBP|UK|영국|파운드|£'), 'GBP'),
+)
+
 # Max retry attempts
 # 최대 재시도 횟수
 MAX_RETRIES = 3
 
+# Backoff for retrying rate-limited (429) and transient (5xx / network) API failures
+# 속도 제한(429) 및 일시적(5xx / 네트워크) API 오류 재시도를 위한 백오프 설정
+RETRY_BASE_DELAY = 1.0   # seconds, doubled on each attempt
+RETRY_MAX_DELAY = 30.0   # cap for the backoff and for server-suggested Retry-After delays
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Number of files processed concurrently in directory mode (API calls are I/O-bound)
+# 디렉토리 모드에서 동시에 처리할 파일 수 (API 호출은 I/O 위주)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "4") or 4)
+
+# On-disk cache of extraction results keyed by file content (set OCR_CACHE_DIR= to disable)
+# 파일 내용을 키로 하는 추출 결과 디스크 캐시 (OCR_CACHE_DIR= 로 비활성화)
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", "~/.cache/receipt_ocr").strip()
+OCR_CACHE_TTL = 30 * 24 * 60 * 60  # 30 days
+
+# Client-side rate limit for Mistral API calls (requests per second, shared by all threads)
+# Mistral API 호출에 대한 클라이언트 측 속도 제한 (초당 요청 수, 모든 스레드 공유)
+OCR_RPS = float(os.getenv("OCR_RPS", "5") or 5)
+_rate_limiter = RateLimiter(OCR_RPS)
+
+# Per-request HTTP timeout in seconds
+# 요청별 HTTP 타임아웃 (초)
+OCR_HTTP_TIMEOUT = float(os.getenv("OCR_HTTP_TIMEOUT", "120") or 120)
+
+# Receipt fields every result is expected to carry
+# 모든 결과에 포함되어야 하는 영수증 필드
+REQUIRED_FIELDS = ("date", "place", "amount", "currency")
+
+# Shared Mistral client, created on first use
+# 처음 사용할 때 생성되는 공유 Mistral 클라이언트
+_mistral_client = None
+_mistral_client_lock = threading.Lock()
+
+def get_mistral_client() -> Mistral:
+    """
+    Get the shared Mistral client
+    공유 Mistral 클라이언트 가져오기
+    
+    The client is created once and reused, so uploads, OCR and chat calls share one
+    HTTP connection pool instead of opening new TCP/TLS connections per file.
+    클라이언트는 한 번만 생성되어 재사용되므로 모든 호출이 하나의 HTTP 연결 풀을 공유합니다.
+    """
+    global _mistral_client
+    if _mistral_client is not None:
+        return _mistral_client
+    with _mistral_client_lock:
+        if _mistral_client is None:
+            _mistral_client = Mistral(api_key=MISTRAL_API_KEY, timeout_ms=int(OCR_HTTP_TIMEOUT * 1000))
+        return _mistral_client
+
+def call_with_retry(func, *args, **kwargs):
+    """
+    Call a Mistral API method, retrying rate limits and transient failures with exponential backoff
+    속도 제한 및 일시적인 오류는 지수 백오프로 재시도하며 Mistral API 메서드 호출
+    
+    Only 429/5xx responses and network errors are retried (up to MAX_RETRIES attempts);
+    a Retry-After header on the response is honored. Every attempt is paced by OCR_RPS.
+    429/5xx 응답과 네트워크 오류만 재시도하며 (최대 MAX_RETRIES회), 응답의 Retry-After 헤더를 따릅니다.
+    모든 시도는 OCR_RPS에 맞춰 간격이 조절됩니다.
+    """
+    for attempt in range(MAX_RETRIES):
+        _rate_limiter.wait()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            status = getattr(e, 'status_code', None)
+            retryable = isinstance(e, httpx.TransportError) or status in RETRYABLE_STATUS_CODES
+            if not retryable or attempt == MAX_RETRIES - 1:
+                raise
+            
+            delay = min(RETRY_BASE_DELAY * (2 ** attempt), RETRY_MAX_DELAY) + random.uniform(0, 0.25)
+            headers = getattr(getattr(e, 'raw_response', None), 'headers', None)
+            if headers and headers.get('Retry-After'):
+                try:
+                    delay = max(delay, min(float(headers['Retry-After']), RETRY_MAX_DELAY))
+                except ValueError:
+                    pass
+            
+            logger.warning(f"Mistral API call failed ({status or type(e).__name__}), "
+                           f"retrying in {delay:.1f}s (attempt {attempt + 1}/{MAX_RETRIES})")
+            time.sleep(delay)
+
 def generate_filename_from_info(extracted_info: Dict[str, Any], original_path: Path) -> str:
     """
     Generate a filename based on extracted receipt information
@@ -93,7 +207,7 @@ def generate_filename_from_info(extracted_info: Dict[str, Any], original_path: P
         # Clean up place name for filename
         if place:
             # Remove special characters and limit length
-            place = re.sub(r'[^\w\s]', '', place)
+            place = _PLACE_STRIP_RE.sub('', place)
             place = place.replace(' ', '_')[:30]
         
         # Format parts of the filename
@@ -131,16 +245,16 @@ def generate_filename_from_info(extracted_info: Dict[str, Any], original_path: P
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         return f"{original_path.stem}_{timestamp}.pdf"
 
-def convert_image_to_pdf(image_path: Union[str, Path]) -> Optional[Path]:
+def convert_image_to_pdf_bytes(image_path: Union[str, Path]) -> Optional[bytes]:
     """
-    Convert an image file to PDF format for Mistral OCR processing
-    이미지 파일을 Mistral OCR 처리를 위해 PDF 형식으로 변환합니다
+    Convert an image file to PDF bytes in memory
+    이미지 파일을 메모리 내 PDF 바이트로 변환합니다
     
     Args:
         image_path: Path to the image file
         
     Returns:
-        Path to the temporary PDF file or None if conversion failed
+        PDF bytes or None if conversion failed
     """
     try:
         image_path = Path(image_path) if not isinstance(image_path, Path) else image_path
@@ -149,25 +263,41 @@ def convert_image_to_pdf(image_path: Union[str, Path]) -> Optional[Path]:
             logger.error(f"Image file not found: {image_path}")
             return None
             
-        if image_path.suffix.lower() not in IMAGE_EXTENSIONS:
+        if image_path.suffix.lower() not in IMAGE_EXTENSION_SET:
             logger.error(f"Not an image file: {image_path}")
             return None
-            
-        # Create a temporary file for the PDF
-        temp_pdf = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
-        temp_pdf_path = Path(temp_pdf.name)
         
-        # Convert image to PDF using img2pdf
-        with open(temp_pdf_path, "wb") as f:
-            f.write(img2pdf.convert(str(image_path)))
-            
-        logger.info(f"Converted {image_path} to PDF: {temp_pdf_path}")
-        return temp_pdf_path
+        pdf_bytes = img2pdf.convert(str(image_path))
+        logger.info(f"Converted {image_path} to PDF in memory ({len(pdf_bytes)} bytes)")
+        return pdf_bytes
         
     except Exception as e:
         logger.error(f"Error converting image to PDF: {e}")
         return None
 
+# os.link errors that mean "links are not possible here" rather than "dst is taken"
+# "dst가 이미 있음"이 아니라 "여기서는 링크 불가"를 뜻하는 os.link 오류
+_LINK_FALLBACK_ERRNOS = frozenset({errno.EXDEV, errno.EPERM, errno.ENOTSUP, errno.EMLINK})
+
+def link_or_copy(src: Union[str, Path], dst: Union[str, Path]) -> None:
+    """
+    Place src at dst by hard link when possible, falling back to a full copy
+    가능하면 하드 링크로 src를 dst에 배치하고, 불가능하면 전체 복사로 대체
+    
+    A hard link is a single metadata operation instead of copying the whole file. It is only
+    replaced by a copy across filesystems or where links are unsupported; any other error,
+    in particular an existing dst, is raised so an earlier receipt is never overwritten.
+    하드 링크는 파일 전체를 복사하지 않는 메타데이터 작업입니다. 다른 파일 시스템이거나 링크를
+    지원하지 않는 경우에만 복사하며, 그 외 오류(특히 dst가 이미 있는 경우)는 기존 영수증을
+    덮어쓰지 않도록 그대로 발생시킵니다.
+    """
+    try:
+        os.link(src, dst)
+    except OSError as e:
+        if e.errno not in _LINK_FALLBACK_ERRNOS:
+            raise
+        shutil.copy2(src, dst)
+
 def setup_directory(input_dir, output_dir=None):
     """
     Ensure input directory exists and create output directory if provided.
@@ -201,26 +331,6 @@ def setup_directory(input_dir, output_dir=None):
     
     return input_path, input_path, temp_path
 
-def encode_file(file_path):
-    """
-    Encode file to base64
-    파일을 base64로 인코딩
-    
-    Args:
-        file_path: Path to the file to encode
-                  인코딩할 파일 경로
-    
-    Returns:
-        Base64 encoded string of the file or None if error occurs
-        파일의 Base64 인코딩 문자열 또는 오류 발생 시 None
-    """
-    try:
-        with open(file_path, "rb") as file:
-            return base64.b64encode(file.read()).decode('utf-8')
-    except Exception as e:
-        logger.error(f"Error encoding file {file_path}: {e}")
-        return None
-
 def process_file(file_path: Union[str, Path], temp_dir: Path, output_dir: Path) -> Optional[Dict[str, Any]]:
     """
     Process a file and extract information using Mistral
@@ -238,39 +348,45 @@ def process_file(file_path: Union[str, Path], temp_dir: Path, output_dir: Path)
         Dictionary with extracted receipt information and missing fields info, or None if error occurs
         추출된 영수증 정보와 누락된 필드 정보를 포함한 딕셔너리 또는 오류 발생 시 None
     """
-    temp_pdf_path = None
+    pdf_bytes = None
     final_pdf_path = None
-    info_path = None
     missing_fields = []
     try:
         file_path = Path(file_path) if not isinstance(file_path, Path) else file_path
-        if not file_path.exists():
+        # Normalize the extension once; it drives both validation and the image/PDF branch
+        suffix = file_path.suffix.lower()
+        if suffix not in SUPPORTED_EXTENSION_SET:
+            logger.error(f"Unsupported file extension: {file_path.suffix}")
+            return None
+        
+        # One stat both confirms the file exists and gives its size
+        # stat 한 번으로 파일 존재 여부와 크기를 함께 확인
+        try:
+            file_size = file_path.stat().st_size
+        except FileNotFoundError:
             logger.error(f"File not found: {file_path}")
             return None
-            
-        if file_path.suffix.lower() not in SUPPORTED_EXTENSIONS:
-            logger.error(f"Unsupported file extension: {file_path.suffix}")
+        
+        # Reject oversized files before converting or uploading them (integer compare on the
+        # common path; the MB figure is only formatted for the error message)
+        if file_size > MAX_FILE_SIZE_BYTES:
+            logger.error(f"File size ({file_size / (1024 * 1024):.2f}MB) exceeds the {MAX_FILE_SIZE_MB}MB limit: {file_path}")
             return None
         
-        # If the file is an image, convert it to PDF first
-        is_image = file_path.suffix.lower() in IMAGE_EXTENSIONS
+        # If the file is an image, convert it to PDF first (in memory, no temporary file)
+        is_image = suffix in IMAGE_EXTENSION_SET
         if is_image:
             logger.info(f"Converting image to PDF: {file_path}")
-            temp_pdf_path = convert_image_to_pdf(file_path)
-            if temp_pdf_path is None:
+            pdf_bytes = convert_image_to_pdf_bytes(file_path)
+            if pdf_bytes is None:
                 logger.error(f"Failed to convert image to PDF: {file_path}")
                 return None
-            # Use the temporary PDF path for processing
-            process_path = temp_pdf_path
-        else:
-            # Use the original file path for PDFs
-            process_path = file_path
             
-        # Extract information using Mistral directly from the file
-        extracted_info = extract_info_with_mistral(process_path)
+        # Extract information using Mistral directly from the file or converted bytes
+        extracted_info = extract_info_with_mistral(file_path, data=pdf_bytes)
 
         # Fill missing fields with 'NA' for date, place, amount, currency
-        for field in ["date", "place", "amount", "currency"]:
+        for field in REQUIRED_FIELDS:
             value = extracted_info.get(field, None)
             if value is None or (isinstance(value, str) and not value.strip()):
                 extracted_info[field] = "NA"
@@ -283,37 +399,44 @@ def process_file(file_path: Union[str, Path], temp_dir: Path, output_dir: Path)
         new_filename = generate_filename_from_info(extracted_info, file_path)
         logger.info(f"Generated filename: {new_filename}")
         
-        # Save intermediate files to temp directory
-        # Save OCR text to temp directory
+        # Save OCR text to temp directory (the extracted JSON when there is no text field)
+        # OCR 텍스트를 temp 디렉토리에 저장 (text 필드가 없으면 추출된 JSON)
         text_path = temp_dir / f"{file_path.stem}_ocr_output.txt"
-        with open(text_path, 'w', encoding='utf-8') as f:
+        with open(text_path, 'wb') as f:
             if 'text' in extracted_info:
-                f.write(extracted_info['text'])
+                f.write(extracted_info['text'].encode('utf-8'))
             else:
-                f.write(json.dumps(extracted_info, ensure_ascii=False, indent=2))
+                f.write(dumps_json_bytes(extracted_info))
         logger.info(f"OCR text saved to: {text_path}")
         
-        # Save extracted info to temp directory
-        info_path = temp_dir / f"{file_path.stem}_extracted_info.json"
-        with open(info_path, 'w', encoding='utf-8') as f:
-            json.dump(extracted_info, f, ensure_ascii=False, indent=2)
-        logger.info(f"Extracted information saved to: {info_path}")
-        
-        # Copy the PDF to the output directory with the new filename
-        if temp_pdf_path:
-            source_pdf = temp_pdf_path
-        else:
-            source_pdf = file_path
-        
+        # Save the PDF to the output directory with the new filename
+        # (a free name is reserved first, so an earlier receipt is never overwritten)
+        # 새 파일 이름으로 출력 디렉토리에 PDF 저장 (먼저 빈 이름을 예약하여 기존 영수증을 덮어쓰지 않음)
         final_pdf_path = output_dir / new_filename
-        shutil.copy2(source_pdf, final_pdf_path)
-        logger.info(f"Renamed PDF saved to: {final_pdf_path}")
+        if final_pdf_path != file_path:
+            final_pdf_path = claim_unique_path(final_pdf_path)
+            try:
+                if pdf_bytes is not None:
+                    with open(final_pdf_path, 'wb') as f:
+                        f.write(pdf_bytes)
+                else:
+                    link_or_copy(file_path, final_pdf_path)
+            finally:
+                release_claimed_path(final_pdf_path)
+            logger.info(f"Renamed PDF saved to: {final_pdf_path}")
         
         # Move original image file to temp directory (if image)
         if is_image:
             moved_path = temp_dir / file_path.name
             try:
-                shutil.move(str(file_path), str(moved_path))
+                try:
+                    os.replace(file_path, moved_path)
+                except OSError as e:
+                    # A caller-supplied temp_dir may be on another filesystem; copy-and-delete then
+                    # 호출자가 지정한 temp_dir가 다른 파일 시스템일 수 있으므로 이 경우 복사 후 삭제
+                    if e.errno != errno.EXDEV:
+                        raise
+                    shutil.move(file_path, moved_path)
                 logger.info(f"Moved original image to temp: {moved_path}")
             except Exception as e:
                 logger.warning(f"Failed to move original image {file_path} to temp: {e}")
@@ -322,7 +445,7 @@ def process_file(file_path: Union[str, Path], temp_dir: Path, output_dir: Path)
         extracted_info['final_pdf_path'] = str(final_pdf_path)
 
         # Identify missing fields
-        for field in ["date", "place", "amount", "currency"]:
+        for field in REQUIRED_FIELDS:
             if not extracted_info.get(field):
                 missing_fields.append(field)
         extracted_info['missing_fields'] = missing_fields
@@ -331,24 +454,10 @@ def process_file(file_path: Union[str, Path], temp_dir: Path, output_dir: Path)
     except Exception as e:
         logger.error(f"Error processing file {file_path}: {e}")
         return None
-    finally:
-        # Clean up temporary PDF file if created
-        if temp_pdf_path and os.path.exists(temp_pdf_path):
-            try:
-                os.unlink(temp_pdf_path)
-                logger.debug(f"Removed temporary PDF file: {temp_pdf_path}")
-            except Exception as e:
-                logger.warning(f"Failed to remove temporary PDF file {temp_pdf_path}: {e}")
-        # Remove temp JSON file
-        if info_path and os.path.exists(info_path):
-            try:
-                os.remove(info_path)
-                logger.debug(f"Removed temp JSON file: {info_path}")
-            except Exception as e:
-                logger.warning(f"Failed to remove temp JSON file {info_path}: {e}")
 
 
-def extract_info_with_mistral(file_path: Union[str, Path], ocr_text: Optional[str] = None) -> Optional[Dict[str, Any]]:
+def extract_info_with_mistral(file_path: Union[str, Path], ocr_text: Optional[str] = None,
+                              data: Optional[bytes] = None) -> Optional[Dict[str, Any]]:
     """
     Use Mistral to extract receipt information
     Mistral을 사용하여 영수증 정보 추출
@@ -358,6 +467,8 @@ def extract_info_with_mistral(file_path: Union[str, Path], ocr_text: Optional[st
                   원본 파일 경로
         ocr_text: OCR extracted text to analyze
                  분석할 OCR 추출 텍스트
+        data: PDF bytes already in memory (e.g. a converted image); the file is read if None
+              메모리에 있는 PDF 바이트 (예: 변환된 이미지); None이면 파일을 읽음
     
     Returns:
         Dictionary with extracted receipt information or None if error occurs
@@ -412,20 +523,48 @@ def extract_info_with_mistral(file_path: Union[str, Path], ocr_text: Optional[st
         "currency": "KRW"
         }"""
     
-        # Initialize Mistral client
-        client = Mistral(api_key=MISTRAL_API_KEY)
+        # Reuse a cached result for identical file content (the key also covers model and prompt).
+        # The original file is hashed, since converted image PDFs embed a creation timestamp.
+        # 동일한 파일 내용이면 캐시된 결과 재사용 (키에 모델과 프롬프트도 포함).
+        # 변환된 이미지 PDF는 생성 시각을 포함하므로 원본 파일로 해시 계산.
+        cache_path = None
+        if OCR_CACHE_DIR:
+            request_key = hashlib.sha1(f"{MISTRAL_LLM_MODEL}\n{prompt}".encode('utf-8')).hexdigest()[:16]
+            content_hash = file_content_hash(Path(file_path))
+            cache_path = Path(OCR_CACHE_DIR).expanduser() / f"{content_hash}_{request_key}.json"
+            cached = load_cached_result(cache_path, OCR_CACHE_TTL)
+            if cached is not None:
+                logger.info(f"Using cached OCR result for {Path(file_path).name}: {cache_path.name}")
+                return cached
+    
+        # Get the shared Mistral client
+        client = get_mistral_client()
         
         # If local document, upload and retrieve the signed url
-        # Convert Path to string for file_name parameter
-        file_path_str = str(file_path)
-        uploaded_file = client.files.upload(
-            file={
-                "file_name": os.path.basename(file_path_str),
-                "content": open(file_path, "rb"),
-            },
-            purpose="ocr"
-        )
-        signed_url = client.files.get_signed_url(file_id=uploaded_file.id)
+        if data is not None:
+            file_name = Path(file_path).with_suffix('.pdf').name
+            uploaded_file = call_with_retry(
+                client.files.upload,
+                file={
+                    "file_name": file_name,
+                    "content": data,
+                },
+                purpose="ocr"
+            )
+        else:
+            def upload_from_disk():
+                # Reopen on every attempt so a retry never sends a partially consumed stream
+                # 재시도 시 일부만 읽힌 스트림을 보내지 않도록 시도마다 파일을 다시 엶
+                with open(file_path, "rb") as f:
+                    return client.files.upload(
+                        file={
+                            "file_name": os.path.basename(str(file_path)),
+                            "content": f,
+                        },
+                        purpose="ocr"
+                    )
+            uploaded_file = call_with_retry(upload_from_disk)
+        signed_url = call_with_retry(client.files.get_signed_url, file_id=uploaded_file.id)
 
         # Define the messages for the chat
         
@@ -445,7 +584,8 @@ def extract_info_with_mistral(file_path: Union[str, Path], ocr_text: Optional[st
         }]
 
         # Use Mistral chat API to extract structured information from OCR text
-        chat_response = client.chat.complete(
+        chat_response = call_with_retry(
+            client.chat.complete,
             model=MISTRAL_LLM_MODEL,
             messages=messages
         )
@@ -459,9 +599,9 @@ def extract_info_with_mistral(file_path: Union[str, Path], ocr_text: Optional[st
             # Extract JSON from response
             try:
                 # Try to find JSON-like content in the response
-                json_match = re.search(r'{.*}', content, re.DOTALL)
+                json_match = _JSON_OBJECT_RE.search(content)
                 if json_match:
-                    extracted_json = json.loads(json_match.group(0))
+                    extracted_json = loads_json(json_match.group(0))
                 else:
                     # If no JSON found, use a default structure
                     extracted_json = {
@@ -481,11 +621,8 @@ def extract_info_with_mistral(file_path: Union[str, Path], ocr_text: Optional[st
                             logger.warning("Date is null or empty")
                             extracted_json['date'] = None
                         else:
-                            # Handle various separators
-                            date_str = re.sub(r'[-./]', '', date_str)
-                            
-                            # Remove any non-digit characters
-                            date_str = re.sub(r'[^\d]', '', date_str)
+                            # Remove separators and any other non-digit characters in one pass
+                            date_str = _NON_DIGIT_RE.sub('', date_str)
                             
                             # Check if we have a valid date format after cleaning
                             if not date_str.isdigit():
@@ -494,8 +631,9 @@ def extract_info_with_mistral(file_path: Union[str, Path], ocr_text: Optional[st
                             elif len(date_str) == 6:  # YYMMDD format
                                 # Add century if only 2-digit year
                                 year = int(date_str[:2])
-                                current_century = datetime.now().year // 100
-                                if year > (datetime.now().year % 100):
+                                current_year = datetime.now().year
+                                current_century = current_year // 100
+                                if year > (current_year % 100):
                                     year_prefix = current_century - 1
                                 else:
                                     year_prefix = current_century
@@ -518,7 +656,7 @@ def extract_info_with_mistral(file_path: Union[str, Path], ocr_text: Optional[st
                     try:
                         # Remove any currency symbols and commas
                         amount_str = str(extracted_json['amount'])
-                        amount_str = re.sub(r'[^\d.]', '', amount_str)
+                        amount_str = _NON_AMOUNT_RE.sub('', amount_str)
                         extracted_json['amount'] = float(amount_str)
                     except Exception as e:
                         logger.warning(f"Failed to convert amount to number: {e}")
@@ -527,20 +665,18 @@ def extract_info_with_mistral(file_path: Union[str, Path], ocr_text: Optional[st
                 if extracted_json.get('currency'):
                     currency = extracted_json['currency'].upper()
                     # Normalize common currency names
-                    if re.search(r'KRW|KOR|원화|₩|KR', currency):
-                        currency = 'KRW'
-                    elif re.search(r'USD|US|미국|달러|\$', currency):
-                        currency = 'USD'
-                    elif re.search(r'EUR|EU|유로|€', currency):
-                        currency = 'EUR'
-                    elif re.search(r'GBP|UK|영국|파운드|£', currency):
-                        currency = 'GBP'
+                    for pattern, code in _CURRENCY_PATTERNS:
+                        if pattern.search(currency):
+                            currency = code
+                            break
                     
                     extracted_json['currency'] = currency
                 else:
                     # Default to KRW if no currency found
                     extracted_json['currency'] = 'KRW'
                 
+                if cache_path is not None and json_match:
+                    save_cached_result(cache_path, extracted_json)
                 return extracted_json
             except Exception as e:
                 logger.error(f"Error parsing response JSON: {e}")
@@ -552,16 +688,23 @@ def extract_info_with_mistral(file_path: Union[str, Path], ocr_text: Optional[st
         logger.error(f"Error extracting info with Mistral: {e}")
         return None
 
-def process_directory(input_dir: Union[str, Path], output_dir: Optional[Path] = None) -> None:
+def process_directory(input_dir: Union[str, Path], output_dir: Optional[Path] = None,
+                      max_workers: Optional[int] = None) -> None:
     """
     Process all files in a directory
     디렉토리의 모든 파일 처리
     
+    Files are processed concurrently by a thread pool, since each file is dominated by
+    the upload, OCR and chat API round trips.
+    각 파일은 업로드, OCR 및 채팅 API 왕복 시간이 대부분이므로 스레드 풀에서 동시에 처리됩니다.
+    
     Args:
         input_dir: Path to the input directory
                   입력 디렉토리 경로
         output_dir: Optional path for output directory
                    선택적 출력 디렉토리 경로
+        max_workers: Number of files to process concurrently (defaults to OCR_WORKERS)
+                    동시에 처리할 파일 수 (기본값: OCR_WORKERS)
     """
     try:
         # Setup directories (input, output, and temp)
@@ -570,30 +713,49 @@ def process_directory(input_dir: Union[str, Path], output_dir: Optional[Path] =
         processed_files = []
         failed_files = []
         missing_info_files = []  # (file_path, missing_fields)
-        missing_field_stats = {"date": 0, "place": 0, "amount": 0, "currency": 0}
-        
-        for file_path in input_path.iterdir():
-            # Skip the temp directory itself
-            if file_path == temp_path:
-                continue
-                
-            if file_path.is_file() and file_path.suffix.lower() in SUPPORTED_EXTENSIONS:
+        missing_field_stats = dict.fromkeys(REQUIRED_FIELDS, 0)
+        
+        # One directory pass; DirEntry.is_file() uses the type from the listing instead of a stat
+        # per entry (the temp directory is skipped as a non-file)
+        # 디렉토리를 한 번만 조회; DirEntry.is_file()은 항목마다 stat하지 않고 목록의 파일 형식을 사용
+        with os.scandir(input_path) as it:
+            input_files = sorted(
+                Path(entry.path) for entry in it
+                if entry.is_file()
+                and os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTENSION_SET
+            )
+        
+        # Process files concurrently; process_file handles its own errors per file
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers or OCR_WORKERS)) as executor:
+            futures = {}
+            for file_path in input_files:
                 logger.info(f"Processing file: {file_path}")
-                
                 # Process file with temp and output directories
-                extracted_info = process_file(file_path, temp_path, output_path)
-                
-                if extracted_info:
-                    processed_files.append((file_path, extracted_info.get('final_pdf_path', '')))
-                    # Track missing fields
-                    missing_fields = extracted_info.get('missing_fields', [])
-                    if missing_fields:
-                        missing_info_files.append((file_path, missing_fields))
-                        for f in missing_fields:
-                            if f in missing_field_stats:
-                                missing_field_stats[f] += 1
-                else:
-                    failed_files.append(file_path)
+                futures[executor.submit(process_file, file_path, temp_path, output_path)] = file_path
+            
+            for future in as_completed(futures):
+                file_path = futures[future]
+                try:
+                    results[file_path] = future.result()
+                except Exception as e:
+                    logger.error(f"Error processing file {file_path}: {e}")
+                    results[file_path] = None
+        
+        # Summarize in directory order
+        for file_path in input_files:
+            extracted_info = results.get(file_path)
+            if extracted_info:
+                processed_files.append((file_path, extracted_info.get('final_pdf_path', '')))
+                # Track missing fields
+                missing_fields = extracted_info.get('missing_fields', [])
+                if missing_fields:
+                    missing_info_files.append((file_path, missing_fields))
+                    for f in missing_fields:
+                        if f in missing_field_stats:
+                            missing_field_stats[f] += 1
+            else:
+                failed_files.append(file_path)
         
         logger.info(f"Successfully processed {len(processed_files)} files")
         logger.info(f"Failed to process {len(failed_files)} files")
@@ -620,8 +782,7 @@ def process_directory(input_dir: Union[str, Path], output_dir: Optional[Path] =
         else:
             logger.info("All processed files have all key information extracted.")
     except Exception as e:
-        logger.error(f"Error processing directory {input_dir}: {e}")
-        logger.error(traceback.format_exc())
+        logger.error(f"Error processing directory {input_dir}: {e}", exc_info=True)
 
 if __name__ == "__main__":
     import argparse
@@ -629,6 +790,8 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Extract information from receipts using Mistral API")
     parser.add_argument("input", help="Path to input file or directory")
     parser.add_argument("--output", "-o", help="Output directory (optional)")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help=f"Number of files to process concurrently in directory mode (default: OCR_WORKERS={OCR_WORKERS})")
     
     args = parser.parse_args()
     
@@ -642,7 +805,7 @@ if __name__ == "__main__":
             parent_dir = input_path.parent
             _, output_dir, temp_dir = setup_directory(parent_dir, output_path)
             
-            if input_path.suffix.lower() in SUPPORTED_EXTENSIONS:
+            if input_path.suffix.lower() in SUPPORTED_EXTENSION_SET:
                 logger.info(f"Processing file: {input_path}")
                 result = process_file(input_path, temp_dir, output_dir)
                 if result:
@@ -654,10 +817,8 @@ if __name__ == "__main__":
                 logger.error(f"Unsupported file extension: {input_path.suffix}")
         elif input_path.is_dir():
             logger.info(f"Processing directory: {input_path}")
-            process_directory(input_path, output_path)
+            process_directory(input_path, output_path, max_workers=args.workers)
         else:
             logger.error(f"Input path does not exist: {input_path}")
     except Exception as e:
-        logger.error(f"Error: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
\ No newline at end of file
+        logger.error(f"Error: {e}", exc_info=True)
\ No newline at end of file
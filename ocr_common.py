@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Shared OCR Helpers
+공용 OCR 헬퍼
+
+Small helpers used by both gemini_ocr and mistral_ocr: JSON encoding, atomic writes,
+content hashing for the result cache, unique output names and client-side rate limiting.
+gemini_ocr와 mistral_ocr가 함께 사용하는 헬퍼: JSON 인코딩, 원자적 쓰기, 결과 캐시용
+내용 해시, 고유한 출력 이름, 클라이언트 측 속도 제한.
+
+This module reads no environment variables and has no import-time side effects; the
+callers own their configuration (.env loading, OCR_RPS, OCR_CACHE_DIR, ...).
+이 모듈은 환경 변수를 읽지 않으며 임포트 시 부작용이 없습니다. 설정(.env 로드, OCR_RPS,
+OCR_CACHE_DIR 등)은 호출하는 모듈이 관리합니다.
+"""
+
+import os
+import json
+import time
+import hashlib
+import mmap
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional, Union
+
+# orjson is optional; it is several times faster than the json module for parsing and writing
+# orjson은 선택 사항이며, 파싱 및 쓰기에서 json 모듈보다 몇 배 빠름
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+def loads_json(data: Union[str, bytes]) -> Any:
+    """
+    Parse JSON text, using orjson when it is installed
+    JSON 텍스트 파싱 (설치된 경우 orjson 사용)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps_json_bytes(data: Dict[str, Any]) -> bytes:
+    """
+    Serialize data to indented UTF-8 JSON bytes, using orjson when it is installed
+    데이터를 들여쓰기된 UTF-8 JSON 바이트로 직렬화 (설치된 경우 orjson 사용)
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    # Encode once so the result can be written in a single call
+    # 한 번에 기록할 수 있도록 한 번만 인코딩
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+def write_bytes_atomic(path: Union[str, Path], data: bytes) -> None:
+    """
+    Write bytes to path atomically: write a temp file next to it, then os.replace it into place
+    바이트를 원자적으로 기록: 같은 디렉토리에 임시 파일을 쓴 뒤 os.replace로 교체
+
+    Readers (and a crash mid-write) never see a partially written file.
+    읽는 쪽(또는 쓰기 중 비정상 종료)에서 부분적으로 기록된 파일이 보이지 않습니다.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+
+def dump_json_file(data: Dict[str, Any], path: Union[str, Path]) -> None:
+    """
+    Atomically write data to path as indented UTF-8 JSON
+    데이터를 들여쓰기된 UTF-8 JSON으로 원자적으로 저장
+    """
+    write_bytes_atomic(path, dumps_json_bytes(data))
+
+def content_hash(data: bytes) -> str:
+    """Hash document bytes for the cache key (blake2b is faster than sha256 in CPython)"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def file_content_hash(path: Path) -> str:
+    """
+    Hash a file through a read-only mmap so large files are not copied into memory
+    대용량 파일을 메모리로 복사하지 않도록 읽기 전용 mmap으로 해시 계산
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return content_hash(b'')  # mmap cannot map an empty file
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return hashlib.blake2b(mm, digest_size=16).hexdigest()
+
+def load_cached_result(cache_path: Path, ttl: float) -> Optional[Dict[str, Any]]:
+    """Load a cached extraction result if it exists and is younger than ttl seconds"""
+    try:
+        if time.time() - cache_path.stat().st_mtime > ttl:
+            return None
+        result = loads_json(cache_path.read_bytes())
+    except (OSError, ValueError):
+        return None
+    return result if isinstance(result, dict) else None
+
+def save_cached_result(cache_path: Path, result: Dict[str, Any]) -> None:
+    """Store an extraction result in the cache; failures are logged and ignored"""
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # Atomic, so concurrent readers never see a partially written entry
+        dump_json_file(result, cache_path)
+    except OSError as e:
+        logger.warning(f"Failed to write OCR cache {cache_path}: {e}")
+
+# Output names claimed by in-flight workers, so concurrent files never pick the same name
+# 진행 중인 작업자가 점유한 출력 이름 (동시에 처리되는 파일이 같은 이름을 고르지 않도록)
+_claimed_names = set()
+_claimed_names_lock = threading.Lock()
+
+def claim_unique_path(target_path: Path) -> Path:
+    """
+    Reserve a target path that neither exists on disk nor is claimed by another worker
+    디스크에 없고 다른 작업자가 점유하지 않은 대상 경로를 예약
+
+    Receipts with identical date/place/amount would otherwise overwrite each other;
+    duplicates get a numeric suffix (name_1.pdf, name_2.pdf, ...).
+    동일한 날짜/상점/금액의 영수증이 서로 덮어쓰지 않도록 중복 시 숫자 접미사를 붙입니다.
+    """
+    stem, suffix = target_path.stem, target_path.suffix
+    candidate = target_path
+    counter = 1
+    with _claimed_names_lock:
+        while candidate in _claimed_names or candidate.exists():
+            candidate = target_path.with_name(f"{stem}_{counter}{suffix}")
+            counter += 1
+        _claimed_names.add(candidate)
+    return candidate
+
+def release_claimed_path(claimed_path: Path) -> None:
+    """
+    Drop a claim made by claim_unique_path once the file exists at that path (or creating it failed)
+    해당 경로에 파일이 생긴 뒤(또는 생성에 실패한 뒤) claim_unique_path의 예약 해제
+
+    Once the file is there, claim_unique_path sees it on disk, so the in-memory claim only has
+    to cover the time between choosing the name and creating the file.
+    파일이 생기면 claim_unique_path가 디스크에서 확인하므로, 메모리상의 예약은 이름을 고른
+    시점부터 파일을 만들 때까지만 필요합니다.
+    """
+    with _claimed_names_lock:
+        _claimed_names.discard(claimed_path)
+
+class RateLimiter:
+    """
+    Client-side request pacing shared by all threads
+    모든 스레드가 공유하는 클라이언트 측 요청 간격 조절
+    """
+    def __init__(self, requests_per_second: float):
+        # 0 (or less) disables the limit
+        self.min_interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._lock = threading.Lock()
+        self._last_call_ts = 0.0
+
+    def wait(self) -> None:
+        """
+        Block until the minimum interval since the previous API call has passed
+        이전 API 호출 이후 최소 간격이 지날 때까지 대기
+        """
+        if self.min_interval <= 0:
+            return
+        with self._lock:
+            elapsed = time.monotonic() - self._last_call_ts
+            if elapsed < self.min_interval:
+                time.sleep(self.min_interval - elapsed)
+            self._last_call_ts = time.monotonic()
@@ -22,51 +22,94 @@ Author: Claude
 
 import sys
 import os
-import glob
-import json
 import time
+import threading
 import tempfile
-import traceback
-from datetime import datetime
 from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QPushButton, QLabel, QLineEdit, 
-    QProgressBar, QTextEdit, QFileDialog, QCheckBox, QGroupBox, 
+    QProgressBar, QPlainTextEdit, QFileDialog, QCheckBox, QGroupBox, 
     QComboBox, QMessageBox
 )
-from PyQt6.QtCore import QThread, pyqtSignal, pyqtSlot
+from PyQt6.QtCore import QThread, QTimer, pyqtSignal, pyqtSlot
+from PyQt6.QtGui import QTextCursor
 from PyQt6 import uic
 
 # Import Gemini OCR functionality
 import gemini_ocr
+# Atomic output writers shared by the OCR modules
+import ocr_common
 # Import language resources
 from language_resources import LanguageManager
 
 # Configure Logger
-import gemini_ocr
 logger = gemini_ocr.logger
 
+# Log lines are buffered and written to the log widget at most once per interval
+# 로그 줄은 버퍼링되어 이 간격마다 최대 한 번 로그 위젯에 기록됨
+LOG_FLUSH_INTERVAL_MS = 100
+
+# Maximum number of lines kept in the log display (oldest lines are dropped)
+# 로그 표시에 유지되는 최대 줄 수 (가장 오래된 줄부터 삭제)
+LOG_MAX_LINES = 5000
+
 class OcrWorker(QThread):
     """
     Worker thread for OCR processing
     OCR 처리를 위한 작업자 스레드
     """
     progress_signal = pyqtSignal(int, int)  # Current, Total
-    result_signal = pyqtSignal(str)         # Status message
+    log_ready_signal = pyqtSignal()         # Status messages queued (see take_log_messages)
     complete_signal = pyqtSignal(bool)      # Success status
 
-    def __init__(self, input_dir, base_dir, rename_files=True, force_process=False, lang_manager=None, temp_dir=None):
+    def __init__(self, input_dir, base_dir, rename_files=True, force_process=False, lang_manager=None, temp_dir=None,
+                 max_workers=None):
         super().__init__()
         self.input_dir = input_dir
         self.base_dir = base_dir
         self.temp_dir = temp_dir
+        self._ocr_temp_dir = None  # Resolved once per batch in run()
+        self._existing_outputs = set()  # Output file names present when the batch started
+        self._base_dir_path = Path(base_dir)
         self.rename_files = rename_files
         self.force_process = force_process
-        self.is_running = True
+        self.max_workers = max(1, max_workers or gemini_ocr.OCR_WORKERS)
+        self._stop_event = threading.Event()  # Set by stop(); shared by the pool threads and retry waits
+        self._log_queue = deque()  # Status messages not yet taken by the GUI thread
+        self._log_lock = threading.Lock()
         self.retry_delay = 2  # Initial retry delay in seconds
         self.lang = lang_manager or LanguageManager()
         
+    def log(self, message):
+        """
+        Queue a status message for the GUI thread
+        GUI 스레드로 보낼 상태 메시지를 큐에 추가
+        
+        Only the first message of a batch emits log_ready_signal; later messages are picked
+        up by the same take_log_messages() call, so a burst from the pool threads crosses
+        the thread boundary once instead of once per line.
+        배치의 첫 메시지만 log_ready_signal을 발생시키고, 이후 메시지는 같은 take_log_messages()
+        호출에서 함께 가져가므로 풀 스레드의 메시지 폭주가 줄마다가 아니라 한 번만 스레드 경계를 넘습니다.
+        """
+        with self._log_lock:
+            notify = not self._log_queue
+            self._log_queue.append(message)
+        if notify:
+            self.log_ready_signal.emit()
+    
+    def take_log_messages(self):
+        """
+        Remove and return all queued status messages (called on the GUI thread)
+        큐에 쌓인 모든 상태 메시지를 꺼내 반환 (GUI 스레드에서 호출)
+        """
+        with self._log_lock:
+            messages = list(self._log_queue)
+            self._log_queue.clear()
+        return messages
+        
     def perform_ocr_with_retry(self, file_path, max_retries=5):
         """
         Perform OCR with retry logic for rate limiting
@@ -83,134 +126,58 @@ class OcrWorker(QThread):
         file_path_obj = Path(file_path) if not isinstance(file_path, Path) else file_path
         file_name = file_path_obj.name
         
-        while retries < max_retries and self.is_running:
+        while retries < max_retries and not self._stop_event.is_set():
             try:
-                # Use the specified temp directory for processing
-                if hasattr(self, 'temp_dir') and self.temp_dir:
-                    temp_dir_path = Path(self.temp_dir)
-                    os.makedirs(temp_dir_path, exist_ok=True)
+                # Use the scratch directory resolved once per batch in run()
+                # run()에서 배치당 한 번 결정된 임시 디렉토리 사용
+                temp_dir_path = self._ocr_temp_dir
+                
+                try:
+                    # The API key is read once at import by gemini_ocr (and the client is reused),
+                    # so there is no need to reload .env on every attempt
+                    # API 키는 gemini_ocr 임포트 시 한 번 읽히므로(클라이언트도 재사용) 시도마다 .env를 재로드할 필요 없음
+                    # Process the file with Gemini OCR
+                    # A result is kept even if Stop arrived meanwhile: process_file has already
+                    # renamed the file, so its extraction output must still be written
+                    # 그 사이 중지되었더라도 결과는 유지: process_file이 이미 파일 이름을 변경했으므로
+                    # 추출 결과를 반드시 기록해야 함
+                    result = gemini_ocr.process_file(file_path_obj, temp_dir_path,
+                                                     cancel_event=self._stop_event,
+                                                     rename=self.rename_files)
                     
-                    try:
-                        # Log API key being used (reload from .env to ensure latest value)
-                        # 사용 중인 API 키 로깅 (.env에서 최신 값 보장을 위해 재로드)
-                        from dotenv import load_dotenv
-                        load_dotenv(override=True)  # .env 파일의 값을 강제로 사용
-                        api_key = os.getenv("GOOGLE_API_KEY", "").strip()  # 공백 제거
-                        if api_key:
-                            masked_key = f"{api_key[:4]}...{api_key[-4:]}" if len(api_key) > 8 else "***"
-                            logger.info(f"ocr_gui.py: Using GOOGLE_API_KEY: {masked_key}")
-                            logger.info(f"ocr_gui.py: Full GOOGLE_API_KEY: {api_key}")
-                        else:
-                            logger.warning("ocr_gui.py: GOOGLE_API_KEY not found")
-                        
-                        # Process the file with Gemini OCR
-                        result = gemini_ocr.process_file(file_path_obj, temp_dir_path)
+                    if result and 'error' not in result:
+                        # Ensure required fields are present and collect the empty ones in one pass
+                        # 필수 필드가 있는지 확인하고 비어 있는 필드를 한 번에 수집
+                        missing_fields = []
+                        for field in gemini_ocr.REQUIRED_FIELDS:
+                            if not result.setdefault(field, None):
+                                missing_fields.append(field)
+                        result['missing_fields'] = missing_fields
                         
-                        if result and 'error' not in result:
-                            # Ensure required fields are present
-                            for field in ["date", "place", "amount", "currency"]:
-                                if field not in result:
-                                    result[field] = None
-                            
-                            # Add OCR text to the result if not present
-                            if 'ocr_text' not in result:
-                                result['ocr_text'] = result.get('extracted_text', '')
-                            
-                            # Add missing fields list
-                            missing_fields = [
-                                field for field in ["date", "place", "amount", "currency"]
-                                if not result.get(field)
-                            ]
-                            result['missing_fields'] = missing_fields
-                            
-                            return result
-                            
-                        elif result and 'error' in result:
-                            error_msg = result['error']
-                            if 'rate limit' in error_msg.lower():
-                                wait_time = 60  # Wait 1 minute for rate limit
-                                self.result_signal.emit(
-                                    self.lang.get_text("rate_limit_wait", wait_time, retries + 1, max_retries))
-                                time.sleep(wait_time)
-                                retries += 1
-                                continue
-                            else:
-                                self.result_signal.emit(f"Error processing {file_name}: {error_msg}")
-                                return None
-                        else:
-                            self.result_signal.emit(
-                                self.lang.get_text("extraction_failed", file_name))
-                            return None
-                            
-                    except Exception as e:
-                        error_str = str(e)
-                        logger.error(f"Error in gemini_ocr.process_file for {file_name}: {error_str}")
-                        logger.error(traceback.format_exc())
-                        raise  # Re-raise to be caught by the outer exception handler
+                        # Add OCR text to the result if not present
+                        if 'ocr_text' not in result:
+                            result['ocr_text'] = result.get('extracted_text', '')
                         
-                else:
-                    # Fallback to system temp directory if not set
-                    with tempfile.TemporaryDirectory() as temp_dir:
-                        temp_dir_path = Path(temp_dir)
+                        return result
                         
-                        try:
-                            # Log API key being used (reload from .env to ensure latest value)
-                            # 사용 중인 API 키 로깅 (.env에서 최신 값 보장을 위해 재로드)
-                            from dotenv import load_dotenv
-                            load_dotenv(override=True)  # .env 파일의 값을 강제로 사용
-                            api_key = os.getenv("GOOGLE_API_KEY", "").strip()  # 공백 제거
-                            if api_key:
-                                masked_key = f"{api_key[:4]}...{api_key[-4:]}" if len(api_key) > 8 else "***"
-                                logger.info(f"ocr_gui.py: Using GOOGLE_API_KEY: {masked_key}")
-                                logger.info(f"ocr_gui.py: Full GOOGLE_API_KEY: {api_key}")
-                            else:
-                                logger.warning("ocr_gui.py: GOOGLE_API_KEY not found")
-                            
-                            # Process the file with Gemini OCR
-                            result = gemini_ocr.process_file(file_path_obj, temp_dir_path)
-                            
-                            if result and 'error' not in result:
-                                # Ensure required fields are present
-                                for field in ["date", "place", "amount", "currency"]:
-                                    if field not in result:
-                                        result[field] = None
-                                
-                                # Add OCR text to the result if not present
-                                if 'ocr_text' not in result:
-                                    result['ocr_text'] = result.get('extracted_text', '')
-                                
-                                # Add missing fields list
-                                missing_fields = [
-                                    field for field in ["date", "place", "amount", "currency"]
-                                    if not result.get(field)
-                                ]
-                                result['missing_fields'] = missing_fields
-                                
-                                return result
-                                
-                            elif result and 'error' in result:
-                                error_msg = result['error']
-                                if 'rate limit' in error_msg.lower():
-                                    wait_time = 60  # Wait 1 minute for rate limit
-                                    self.result_signal.emit(
-                                        self.lang.get_text("rate_limit_wait", wait_time, retries + 1, max_retries))
-                                    time.sleep(wait_time)
-                                    retries += 1
-                                    continue
-                                else:
-                                    self.result_signal.emit(f"Error processing {file_name}: {error_msg}")
-                                    return None
-                            else:
-                                self.result_signal.emit(
-                                    self.lang.get_text("extraction_failed", file_name))
-                                return None
-                                
-                        except Exception as e:
-                            error_str = str(e)
-                            logger.error(f"Error in gemini_ocr.process_file for {file_name}: {error_str}")
-                            logger.error(traceback.format_exc())
-                            raise  # Re-raise to be caught by the outer exception handler
+                    elif result and 'error' in result:
+                        # The message is built by process_file (it contains the file path, not the
+                        # API error), and rate limits were already retried with backoff inside
+                        # gemini_ocr, so report it instead of calling the API again
+                        # 메시지는 process_file이 만든 것(API 오류가 아닌 파일 경로 포함)이며 속도 제한은
+                        # gemini_ocr 내부에서 이미 백오프로 재시도되었으므로, API를 다시 호출하지 않고 보고
+                        self.log(f"Error processing {file_name}: {result['error']}")
+                        return None
+                    else:
+                        self.log(
+                            self.lang.get_text("extraction_failed", file_name))
+                        return None
                         
+                except Exception as e:
+                    error_str = str(e)
+                    logger.error(f"Error in gemini_ocr.process_file for {file_name}: {error_str}")
+                    raise  # Re-raise to be caught by the outer exception handler (which logs the traceback)
+                
             except Exception as e:
                 error_str = str(e)
                 
@@ -220,205 +187,188 @@ class OcrWorker(QThread):
                 else:
                     retry_msg = " (final attempt)"
                 
-                logger.error(f"Error processing {file_name}{retry_msg}: {error_str}")
-                logger.error(traceback.format_exc())
+                logger.error(f"Error processing {file_name}{retry_msg}: {error_str}", exc_info=True)
                 
                 # User feedback
                 if retries < max_retries - 1:
-                    self.result_signal.emit(
+                    self.log(
                         f"Retry {retries + 1}/{max_retries}: Error processing {file_name}")
                 else:
-                    self.result_signal.emit(
+                    self.log(
                         f"Failed to process {file_name} after {max_retries} attempts: {error_str}")
                 
                 # Check if it's a rate limit error
-                if any(term in error_str.lower() for term in ["429", "rate limit", "quota"]):
+                if gemini_ocr.RATE_LIMIT_RE.search(error_str):
                     retries += 1
                     if retries >= max_retries:
-                        self.result_signal.emit(self.lang.get_text("rate_limit_max"))
+                        self.log(self.lang.get_text("rate_limit_max"))
                         return None
                     
                     wait_time = self.retry_delay * (2 ** (retries - 1))  # Exponential backoff
-                    self.result_signal.emit(
+                    self.log(
                         self.lang.get_text("rate_limit_wait", wait_time, retries, max_retries))
                     
-                    # Wait with checking for stop signal
-                    for _ in range(wait_time * 10):  # Check 10 times per second
-                        if not self.is_running:
-                            return None
-                        time.sleep(0.1)
+                    # Wait, returning immediately if processing is stopped
+                    # 대기 중 처리가 중지되면 즉시 반환
+                    if self._stop_event.wait(wait_time):
+                        return None
                 else:
                     # For other errors, increment retry counter and continue
                     retries += 1
                     if retries < max_retries:
-                        time.sleep(1)  # Short delay before retry for non-rate-limit errors
+                        # Short delay before retry for non-rate-limit errors
+                        if self._stop_event.wait(1):
+                            return None
                     
         return None
         
+    def _process_one(self, file_path, temp_output_dir):
+        """
+        Process a single file: OCR, save results, and optionally rename it
+        단일 파일 처리: OCR, 결과 저장 및 선택적 파일 이름 변경
+        
+        Runs on a pool thread; results are reported through log(), which queues them
+        for the GUI thread.
+        풀 스레드에서 실행되며, 결과는 GUI 스레드로 전달되도록 log()로 큐에 넣어 보고됩니다.
+        """
+        if self._stop_event.is_set():
+            return
+            
+        # Derive the path pieces once (list_supported_files already yields Path objects)
+        # 경로 구성 요소는 한 번만 계산 (list_supported_files가 이미 Path 객체를 반환)
+        file_path_obj = file_path if isinstance(file_path, Path) else Path(file_path)
+        filename = file_path_obj.name
+        stem = file_path_obj.stem
+        self.log(self.lang.get_text("processing_file", filename))
+        
+        # Check if output files already exist
+        json_path = temp_output_dir / f"{stem}_extracted_info.json"
+        if not self.force_process and json_path.name in self._existing_outputs:
+            self.log(self.lang.get_text("skipping_file", filename))
+            return
+        
+        # Perform OCR using Gemini with retry logic
+        result = self.perform_ocr_with_retry(file_path_obj)
+        if result is None and self._stop_event.is_set():
+            return
+        
+        # Only show extraction failed if we actually failed to process the file
+        # (result is None) or if we have an explicit error in the result
+        if result is None or (isinstance(result, dict) and 'error' in result):
+            if result and 'error' in result:
+                self.log(f"{filename}: {result['error']}")
+            else:
+                self.log(
+                    self.lang.get_text("extraction_failed", filename))
+            return
+        
+        # Save results to files
+        try:
+            # Save OCR text
+            text_path = temp_output_dir / f"{stem}_ocr_output.txt"
+            ocr_common.write_bytes_atomic(text_path, result.get("ocr_text", "").encode('utf-8'))
+            
+            # Save extracted information (orjson when available)
+            ocr_common.dump_json_file(result, json_path)
+            
+            self.log(
+                self.lang.get_text("process_success", filename, text_path))
+                
+            # gemini_ocr.process_file has already renamed the file (if requested); just report the new name
+            # gemini_ocr.process_file에서 (요청 시) 이미 파일 이름이 변경되었으므로 새 이름만 보고
+            final_path = result.get('final_path')
+            if final_path and final_path != str(file_path_obj):
+                self.log(f"Renamed: {filename} -> {Path(final_path).name}")
+        
+        except Exception as e:
+            self.log(
+                f"Error saving results for {filename}: {str(e)}")
+
+        
     def run(self):
+        scratch_dir = None
         try:
-            # Define supported file types
-            supported_extensions = gemini_ocr.SUPPORTED_EXTENSIONS
-            input_files = []
+            # Resolve the temp directories once per batch instead of per file / per attempt
+            # 파일/시도마다가 아니라 배치당 한 번 임시 디렉토리 결정
+            temp_output_dir = Path(self.temp_dir) if self.temp_dir else self._base_dir_path / "temp"
+            temp_output_dir.mkdir(parents=True, exist_ok=True)
+            self._base_dir_path.mkdir(parents=True, exist_ok=True)
             
-            # Find all files with supported extensions
-            for ext in supported_extensions:
-                # Search for both lowercase and uppercase extensions
-                pattern_lower = os.path.join(self.input_dir, f"*{ext.lower()}")
-                pattern_upper = os.path.join(self.input_dir, f"*{ext.upper()}")
-                input_files.extend(glob.glob(pattern_lower))
-                input_files.extend(glob.glob(pattern_upper))
+            # List existing outputs once instead of stat-ing a path per file for the skip check
+            # 건너뛰기 확인을 위해 파일마다 stat하는 대신 기존 출력 목록을 한 번만 조회
+            if not self.force_process:
+                with os.scandir(temp_output_dir) as it:
+                    self._existing_outputs = {entry.name for entry in it}
+            if self.temp_dir:
+                self._ocr_temp_dir = temp_output_dir
+            else:
+                scratch_dir = tempfile.TemporaryDirectory(prefix="ocr_")
+                self._ocr_temp_dir = Path(scratch_dir.name)
             
-            # Remove any duplicates while preserving order
-            input_files = list(dict.fromkeys(input_files))
+            # Find all files with supported extensions (single directory scan, case-insensitive)
+            input_files = gemini_ocr.list_supported_files(self.input_dir)
             
             if not input_files:
-                self.result_signal.emit(self.lang.get_text("no_files_found"))
+                self.log(self.lang.get_text("no_files_found"))
                 self.complete_signal.emit(False)
                 return
                 
-            self.result_signal.emit(self.lang.get_text("found_files", len(input_files)))
+            self.log(self.lang.get_text("found_files", len(input_files)))
             total_files = len(input_files)
             processed = 0
+            last_percent = -1
             
-            # Process each file
-            for file_path in input_files:
-                if not self.is_running:
-                    self.result_signal.emit(self.lang.get_text("processing_stopped"))
-                    self.complete_signal.emit(False)
-                    return
-                    
-                filename = os.path.basename(file_path)
-                base_name = os.path.splitext(filename)[0]
-                
-                # Use the selected temp directory directly
-                temp_output_dir = Path(self.temp_dir) if hasattr(self, 'temp_dir') and self.temp_dir else Path(self.base_dir) / "temp"
-                os.makedirs(temp_output_dir, exist_ok=True)
-                
-                output_path = temp_output_dir / f"{base_name}.json"
-                self.result_signal.emit(self.lang.get_text("processing_file", filename))
-                
-                # Check if output files already exist
-                file_path_obj = Path(file_path)
-                json_path = temp_output_dir / f"{file_path_obj.stem}_extracted_info.json"
-                if json_path.exists() and not self.force_process:
-                    self.result_signal.emit(self.lang.get_text("skipping_file", filename))
-                    processed += 1
-                    self.progress_signal.emit(processed, total_files)
-                    continue
-                
-                # Perform OCR using Gemini with retry logic
-                result = self.perform_ocr_with_retry(file_path_obj)
-                
-                # Only show extraction failed if we actually failed to process the file
-                # (result is None) or if we have an explicit error in the result
-                if result is None or (isinstance(result, dict) and 'error' in result):
-                    if result and 'error' in result:
-                        self.result_signal.emit(f"{filename}: {result['error']}")
-                    else:
-                        self.result_signal.emit(
-                            self.lang.get_text("extraction_failed", filename))
-                    processed += 1
-                    self.progress_signal.emit(processed, total_files)
-                    continue
-                
-                # Save results to files in temp directory
-                try:
-                    # Save OCR text
-                    text_path = temp_output_dir / f"{file_path_obj.stem}_ocr_output.txt"
-                    with open(text_path, 'w', encoding='utf-8') as f:
-                        f.write(result.get("ocr_text", ""))
+            # Process files concurrently; the shared rate limiter in gemini_ocr (OCR_RPS) paces
+            # the API requests, so no fixed delay between files is needed
+            # 파일을 동시에 처리; gemini_ocr의 공유 속도 제한기(OCR_RPS)가 API 요청 간격을 조절하므로
+            # 파일 사이의 고정 대기가 필요 없음
+            executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            try:
+                futures = [executor.submit(self._process_one, file_path, temp_output_dir)
+                           for file_path in input_files]
+                for future in as_completed(futures):
+                    if self._stop_event.is_set():
+                        # The shutdown below drops queued files and waits for in-flight ones
+                        # 아래 shutdown이 대기 중인 파일을 취소하고 처리 중인 파일을 기다림
+                        break
                     
-                    # Save extracted information
-                    with open(json_path, 'w', encoding='utf-8') as f:
-                        json.dump(result, f, ensure_ascii=False, indent=2)
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self.log(self.lang.get_text("ocr_error", str(e)))
                     
-                    self.result_signal.emit(
-                        self.lang.get_text("process_success", filename, text_path))
-                except Exception as e:
-                    self.result_signal.emit(
-                        f"Error saving results for {filename}: {str(e)}")
-                
-                # Only show extraction failed if we actually failed to process the file
-                # (result is None) or if we have an explicit error in the result
-                if result is None or (isinstance(result, dict) and 'error' in result):
-                    if result and 'error' in result:
-                        self.result_signal.emit(f"{filename}: {result['error']}")
-                    else:
-                        self.result_signal.emit(
-                            self.lang.get_text("extraction_failed", filename))
                     processed += 1
-                    self.progress_signal.emit(processed, total_files)
-                    continue
-                
-                # Save results to files
-                try:
-                    os.makedirs(self.base_dir, exist_ok=True)
-                    
-                    # Save OCR text
-                    with open(text_path, 'w', encoding='utf-8') as f:
-                        f.write(result.get("ocr_text", ""))
-                    
-                    # Save extracted information
-                    with open(json_path, 'w', encoding='utf-8') as f:
-                        json.dump(result, f, ensure_ascii=False, indent=2)
-                    
-                    self.result_signal.emit(
-                        f"{filename} processed successfully. Output saved to {text_path}")
-                        
-                    # Rename the file if requested
-                    if self.rename_files and result.get('place') and result.get('date'):
-                        try:
-                            # Generate new filename
-                            new_filename = gemini_ocr.generate_filename_from_info(result, file_path_obj)
-                            new_file_path = Path(self.base_dir) / new_filename
-                            
-                            # Skip if source file doesn't exist (already processed)
-                            if not file_path_obj.exists():
-                                self.result_signal.emit(
-                                    f"Skipping rename - source file not found: {filename}")
-                            else:
-                                # If the new file exists, remove it first
-                                if new_file_path.exists():
-                                    try:
-                                        os.remove(str(new_file_path))
-                                    except OSError as e:
-                                        self.result_signal.emit(
-                                            f"Warning: Could not overwrite {new_file_path.name}: {str(e)}")
-                                
-                                # Rename the original file
-                                file_path_obj.rename(new_file_path)
-                                self.result_signal.emit(
-                                    f"Renamed: {filename} -> {new_file_path.name}")
-                                    
-                        except Exception as e:
-                            self.result_signal.emit(
-                                f"Error renaming file {filename}: {str(e)}")
-                
-                except Exception as e:
-                    self.result_signal.emit(
-                        f"Error saving results for {filename}: {str(e)}")
-                
-                processed += 1
-                self.progress_signal.emit(processed, total_files)
-                
-                # Add a small delay between files to avoid rate limiting
-                if self.is_running:
-                    self.result_signal.emit(self.lang.get_text("waiting_next"))
-                    time.sleep(1)
+                    # The bar only shows whole percents, so skip updates that would not move it
+                    # 진행 표시줄은 정수 퍼센트만 표시하므로 변화가 없는 업데이트는 건너뜀
+                    percent = processed * 100 // total_files
+                    if percent != last_percent:
+                        last_percent = percent
+                        self.progress_signal.emit(processed, total_files)
+            finally:
+                # Completion is only reported after every in-flight file has finished, so the
+                # GUI never re-enables Start while this pool is still renaming files
+                # 처리 중인 모든 파일이 끝난 뒤에만 완료를 알려, 풀이 아직 파일 이름을 변경하는 동안
+                # GUI가 시작 버튼을 다시 활성화하지 않도록 함
+                executor.shutdown(wait=True, cancel_futures=True)
                 
             # Final status update
-            if self.is_running:
-                self.result_signal.emit(
+            if self._stop_event.is_set():
+                self.log(self.lang.get_text("processing_stopped"))
+                self.complete_signal.emit(False)
+            else:
+                self.log(
                     self.lang.get_text("ocr_complete_count", processed))
                 self.complete_signal.emit(True)
             
         except Exception as e:
-            self.result_signal.emit(self.lang.get_text("ocr_error", str(e)))
+            self.log(self.lang.get_text("ocr_error", str(e)))
             self.complete_signal.emit(False)
+        finally:
+            if scratch_dir is not None:
+                scratch_dir.cleanup()
     
     def stop(self):
-        self.is_running = False
+        self._stop_event.set()
 
 
 
@@ -437,6 +387,16 @@ class OcrApp(QMainWindow):
         self.temp_dir = ""
         self.worker = None
         
+        # Buffered log output, flushed to the widget by a timer
+        # 타이머로 위젯에 반영되는 버퍼링된 로그 출력
+        self._log_buffer = deque()
+        self._log_ts_second = -1
+        self._log_ts_text = ""
+        self._log_flush_timer = QTimer(self)
+        self._log_flush_timer.setSingleShot(True)
+        self._log_flush_timer.setInterval(LOG_FLUSH_INTERVAL_MS)
+        self._log_flush_timer.timeout.connect(self.flushLog)
+        
         # Initialize language manager with default language (Korean)
         self.lang_manager = LanguageManager("ko")
         
@@ -500,6 +460,14 @@ class OcrApp(QMainWindow):
         # Load the UI file
         uic.loadUi('ocr_gui.ui', self)
         
+        # Bound the log display so long runs don't grow the document without limit
+        # 긴 작업에서도 문서가 무한히 커지지 않도록 로그 표시 크기 제한
+        self.log_text.setMaximumBlockCount(LOG_MAX_LINES)
+        
+        # Default the concurrency control to OCR_WORKERS
+        # 동시 처리 수 기본값을 OCR_WORKERS로 설정
+        self.workers_spin.setValue(gemini_ocr.OCR_WORKERS)
+        
         # Populate language combo box
         self.lang_combo.clear()
         for lang_code, lang_name in self.lang_manager.get_languages().items():
@@ -541,6 +509,7 @@ class OcrApp(QMainWindow):
             # Update OCR options
             self.options_group.setTitle(self.lang_manager.get_text("options_group"))
             self.rate_limit_label.setText(self.lang_manager.get_text("rate_limit_warning"))
+            self.workers_label.setText(self.lang_manager.get_text("workers_label"))
             
             # Update rename option
             self.rename_group.setTitle(self.lang_manager.get_text("rename_group"))
@@ -613,12 +582,54 @@ class OcrApp(QMainWindow):
         Add a message to the log display
         로그 표시에 메시지 추가
         """
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.log_text.append(f"[{timestamp}] {message}")
+        self.logMessages((message,))
+    
+    def logMessages(self, messages):
+        """
+        Add a batch of messages to the log display under one timestamp
+        하나의 타임스탬프로 여러 메시지를 로그 표시에 추가
+        """
+        # Format the timestamp at most once per second; bursts of messages reuse the cached string
+        # 타임스탬프는 초당 최대 한 번만 포맷하고, 메시지가 몰리면 캐시된 문자열을 재사용
+        now = int(time.time())
+        if now != self._log_ts_second:
+            self._log_ts_second = now
+            self._log_ts_text = time.strftime("%H:%M:%S", time.localtime(now))
+        prefix = f"[{self._log_ts_text}] "
+        self._log_buffer.extend(prefix + message for message in messages)
+        # Coalesce bursts of messages (e.g. from the worker pool) into one widget update
+        # 메시지 폭주(예: 작업자 풀)를 한 번의 위젯 업데이트로 합침
+        if not self._log_flush_timer.isActive():
+            self._log_flush_timer.start()
+    
+    @pyqtSlot()
+    def drainWorkerLog(self):
+        """
+        Move the worker's queued status messages into the log buffer
+        작업자 큐의 상태 메시지를 로그 버퍼로 이동
+        """
+        worker = self.sender()
+        if worker is None:
+            return
+        messages = worker.take_log_messages()
+        if messages:
+            self.logMessages(messages)
+    
+    def flushLog(self):
+        """
+        Write buffered log messages to the log display in a single update
+        버퍼링된 로그 메시지를 한 번의 업데이트로 로그 표시에 기록
+        """
+        if not self._log_buffer:
+            return
+        lines = "\n".join(self._log_buffer)
+        self._log_buffer.clear()
+        
+        self.log_text.setUpdatesEnabled(False)
+        self.log_text.appendPlainText(lines)
+        self.log_text.setUpdatesEnabled(True)
         # Scroll to the bottom
-        self.log_text.verticalScrollBar().setValue(
-            self.log_text.verticalScrollBar().maximum()
-        )
+        self.log_text.moveCursor(QTextCursor.MoveOperation.End)
     
     def startProcessing(self):
         """
@@ -668,9 +679,16 @@ class OcrApp(QMainWindow):
         self.stop_btn.setEnabled(True)
         self.browse_btn.setEnabled(False)
         self.temp_browse_btn.setEnabled(False)
+        self.workers_spin.setEnabled(False)
         
         self.logMessage(self.lang_manager.get_text("starting_ocr"))
         
+        # The previous worker has reported completion; let its thread finish returning
+        # before the QThread object is replaced
+        # 이전 작업자는 완료를 알린 상태이므로, QThread 객체를 교체하기 전에 스레드 종료를 기다림
+        if self.worker is not None:
+            self.worker.wait()
+        
         # Create and start worker thread
         self.worker = OcrWorker(
             self.input_dir, 
@@ -678,11 +696,12 @@ class OcrApp(QMainWindow):
             rename_files=self.rename_check.isChecked(),
             force_process=not self.skip_existing_check.isChecked(),
             lang_manager=self.lang_manager,
-            temp_dir=getattr(self, 'temp_dir', None)
+            temp_dir=getattr(self, 'temp_dir', None),
+            max_workers=self.workers_spin.value()
         )
         
         self.worker.progress_signal.connect(self.updateProgress)
-        self.worker.result_signal.connect(self.logMessage)
+        self.worker.log_ready_signal.connect(self.drainWorkerLog)
         self.worker.complete_signal.connect(self.processingComplete)
         
         self.worker.start()
@@ -719,6 +738,7 @@ class OcrApp(QMainWindow):
         self.stop_btn.setEnabled(False)
         self.browse_btn.setEnabled(True)
         self.temp_browse_btn.setEnabled(True)
+        self.workers_spin.setEnabled(True)
         
         if success:
             self.logMessage(self.lang_manager.get_text("ocr_complete"))